@@ -28,6 +28,8 @@ of some modules:
   * ly.node: a generic list-like node object to build tree structures with
   * ly.document: a tokenized text document (LilyPond file)
   * ly.docinfo: harvests and caches various information from a LilyPond document
+  * ly.docinfocache: stores DocInfo summaries of many files on disk
+  * ly.deps: finds the files LilyPond documents include
   * ly.lex: a parser for LilyPond, Scheme, and other formats, using slexer
   * ly.music: a tree structure of the contents of a document
   * ly.pitch: functions for translating, transposing etc
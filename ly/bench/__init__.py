@@ -0,0 +1,279 @@
+# This file is part of python-ly, https://pypi.python.org/pypi/python-ly
+#
+# Copyright (c) 2015 by Wilbert Berendsen
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 3
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+# See http://www.gnu.org/licenses/ for more information.
+
+r"""
+Benchmarks for python-ly.
+
+Synthetic documents are generated by the functions in the corpus module
+(LilyPond, LaTeX and HTML for lilypond-book, and LilyPond with much Scheme
+code), at the requested sizes and from a seed, so the results of different
+versions of python-ly can be compared.
+
+Every stage in the stages dictionary is a function that is called with the
+text and mode of a document, does the necessary preparation, and returns a
+function that performs the work to be measured, and the number of
+operations it performs (for most stages 1).
+
+Use the run() function, or run the benchmarks from the command line::
+
+    python -m ly.bench --sizes 100,1000 --output result.json
+
+The result is a dictionary (written as JSON by the command line) with for
+every corpus, size and stage the best time, the throughput in lines and
+characters per second, and the peak memory allocated while running the
+stage.
+
+"""
+
+from __future__ import unicode_literals
+
+import gc
+import platform
+import random
+import time
+import tracemalloc
+
+import ly.pkginfo
+import ly.document
+import ly.lex
+
+from . import corpus
+
+
+def _document(text, mode):
+    """Construct a Document."""
+    return lambda: ly.document.Document(text, mode), 1
+
+
+def _edit(text, mode, count=100, seed=0):
+    """Apply count small changes, each with its own apply_changes() call."""
+    doc = ly.document.Document(text, mode)
+    r = random.Random(seed)
+    inserts = (' c4', ' \\p', '\n', ' { ', ' } ', ' % comment\n', '"', '#(')
+    def run():
+        for i in range(count):
+            size = doc.size()
+            pos = r.randrange(size)
+            with doc:
+                if r.random() < 0.3:
+                    del doc[pos:min(pos + r.randint(1, 10), size)]
+                else:
+                    doc[pos:pos] = r.choice(inserts)
+    return run, count
+
+
+def _batchedit(text, mode, count=100, seed=0):
+    """Apply count small changes, spread over the document, in one edit context.
+
+    This is what tools like a search and replace do: all changes are applied
+    by one apply_changes() call.
+
+    """
+    doc = ly.document.Document(text, mode)
+    r = random.Random(seed)
+    inserts = (' c4', ' \\p', '\n', ' % comment\n')
+    count = min(count, doc.size())
+    def run():
+        with doc:
+            for pos in r.sample(range(doc.size()), count):
+                doc[pos:pos] = r.choice(inserts)
+    return run, count
+
+
+def _docinfo(text, mode):
+    """Create a DocInfo and ask the version and language."""
+    import ly.docinfo
+    doc = ly.document.Document(text, mode)
+    def run():
+        info = ly.docinfo.DocInfo(doc)
+        info.version()
+        info.language()
+    return run, 1
+
+
+def _music(text, mode):
+    """Build the ly.music tree of the document."""
+    import ly.music
+    doc = ly.document.Document(text, mode)
+    def run():
+        for node in ly.music.document(doc).iter_depth():
+            pass
+    return run, 1
+
+
+def _musictree(text, mode):
+    """Build the ly.music tree of the document and keep it.
+
+    The tree is built once beforehand, so that the tokens the document
+    caches are not measured: the peak memory is the size of the tree.
+
+    """
+    import ly.music
+    doc = ly.document.Document(text, mode)
+    ly.music.document(doc)
+    trees = []
+    def run():
+        trees.append(ly.music.document(doc))
+    return run, 1
+
+
+def _transpose(text, mode):
+    """Transpose the document a major second up."""
+    import ly.pitch
+    import ly.pitch.transpose
+    doc = ly.document.Document(text, mode)
+    transposer = ly.pitch.transpose.Transposer(ly.pitch.Pitch(0), ly.pitch.Pitch(1))
+    def run():
+        ly.pitch.transpose.transpose(ly.document.Cursor(doc), transposer)
+    return run, 1
+
+
+def _indent(text, mode):
+    """Indent the document."""
+    import ly.indent
+    doc = ly.document.Document(text, mode)
+    def run():
+        ly.indent.Indenter().indent(ly.document.Cursor(doc))
+    return run, 1
+
+
+def _highlight(text, mode):
+    """Write the document as syntax colored HTML."""
+    import ly.colorize
+    doc = ly.document.Document(text, mode)
+    def run():
+        ly.colorize.HtmlWriter().html(ly.document.Cursor(doc))
+    return run, 1
+
+
+def _musicxml(text, mode):
+    """Export the document to MusicXML."""
+    import ly.musicxml
+    doc = ly.document.Document(text, mode)
+    def run():
+        writer = ly.musicxml.writer()
+        writer.parse_document(doc)
+        writer.musicxml().tostring()
+    return run, 1
+
+
+#: The stages by name, in the order they are run.
+stages = {
+    'document': _document,
+    'edit': _edit,
+    'batchedit': _batchedit,
+    'docinfo': _docinfo,
+    'music': _music,
+    'musictree': _musictree,
+    'transpose': _transpose,
+    'indent': _indent,
+    'highlight': _highlight,
+    'musicxml': _musicxml,
+}
+
+#: The stages that only make sense for documents in LilyPond mode.
+lilypond_only = frozenset(('music', 'musictree', 'transpose', 'musicxml'))
+
+
+def measure(stage, text, mode, repeat=3):
+    """Measure one stage with the text in the mode.
+
+    Returns a tuple(seconds, operations, peak_memory). The seconds are the
+    best of repeat runs, every run is prepared anew. The peak memory is the
+    maximum number of bytes allocated during an extra run with tracemalloc
+    enabled.
+
+    """
+    best = None
+    for i in range(repeat):
+        func, operations = stage(text, mode)
+        gc.collect()
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    func, operations = stage(text, mode)
+    gc.collect()
+    tracemalloc.start()
+    try:
+        func()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return best, operations, peak
+
+
+def run(sizes=(100, 1000), corpus_names=None, stage_names=None, seed=0,
+        repeat=3, line_cache=False, log=None):
+    """Run the benchmarks and return the results as a dictionary.
+
+    sizes is a sequence of document sizes in lines. corpus_names and
+    stage_names are lists of names from corpus.generators and the stages
+    dictionary, by default all are run. seed is used to generate the documents.
+
+    If line_cache is False (the default), ly.lex.line_cache is disabled
+    while running, so that the (repetitive) documents are really tokenized.
+    If log is given, it is called with a message before every stage.
+
+    """
+    corpus_names = list(corpus_names or corpus.generators)
+    stage_names = list(stage_names or stages)
+    results = []
+    saved_size = ly.lex.line_cache.info()['maxsize']
+    if not line_cache:
+        ly.lex.line_cache.resize(0)
+    try:
+        for name in corpus_names:
+            mode = corpus.modes[name]
+            for size in sizes:
+                text = corpus.generators[name](size, seed)
+                lines = text.count('\n') + 1
+                for stage in stage_names:
+                    if stage in lilypond_only and mode != 'lilypond':
+                        continue
+                    if log:
+                        log("{0} {1} {2}".format(name, size, stage))
+                    seconds, operations, peak = measure(
+                        stages[stage], text, mode, repeat)
+                    rate = lambda n: n / seconds if seconds else None
+                    results.append({
+                        'corpus': name,
+                        'size': size,
+                        'stage': stage,
+                        'lines': lines,
+                        'chars': len(text),
+                        'operations': operations,
+                        'seconds': seconds,
+                        'lines_per_second': rate(lines),
+                        'chars_per_second': rate(len(text)),
+                        'operations_per_second': rate(operations),
+                        'peak_memory': peak,
+                    })
+    finally:
+        ly.lex.line_cache.resize(saved_size)
+    return {
+        'version': ly.pkginfo.version,
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'seed': seed,
+        'repeat': repeat,
+        'line_cache': line_cache,
+        'results': results,
+    }
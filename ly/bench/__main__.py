@@ -0,0 +1,135 @@
+# This file is part of python-ly, https://pypi.python.org/pypi/python-ly
+#
+# Copyright (c) 2015 by Wilbert Berendsen
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 3
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+# See http://www.gnu.org/licenses/ for more information.
+
+"""
+Usage: python -m ly.bench [options]
+
+Runs the python-ly benchmarks on synthetic documents and writes the results
+as JSON to standard output.
+
+Options:
+  -h, --help             show this help text and exit
+  -s, --sizes SIZES      comma-separated document sizes in lines
+                         (default: 100,1000)
+  -c, --corpus NAMES     comma-separated corpus names (default: all)
+                         available: lilypond, latex, html, scheme
+  -t, --stages NAMES     comma-separated stage names (default: all)
+                         available: document, edit, batchedit, docinfo,
+                         music, musictree, transpose, indent, highlight,
+                         musicxml
+  -r, --repeat N         number of timed runs per stage, the best is
+                         reported (default: 3)
+  --seed N               seed for generating the documents (default: 0)
+  --line-cache           keep ly.lex.line_cache enabled
+  -o, --output FILE      write the JSON to FILE instead of standard output
+  -v, --verbose          print each stage to standard error when it starts
+
+"""
+
+from __future__ import unicode_literals
+
+import json
+import sys
+
+from . import corpus, stages, run
+
+
+def die(message):
+    """Exit with message to STDERR."""
+    sys.stderr.write("error: " + message + '\n')
+    sys.stderr.write("See python -m ly.bench -h for a list of options.\n")
+    sys.exit(1)
+
+
+def names(arg, available, what):
+    """Return the list of comma-separated names, die if one is unknown."""
+    result = [n.strip() for n in arg.split(',') if n.strip()]
+    for n in result:
+        if n not in available:
+            die("unknown {0}: {1}".format(what, n))
+    return result
+
+
+def number(arg, what):
+    """Return the argument as a positive int, die if that fails."""
+    try:
+        n = int(arg)
+    except ValueError:
+        n = 0
+    if n < 1:
+        die("invalid {0}: {1}".format(what, arg))
+    return n
+
+
+def main():
+    """Run the benchmarks with the options from the command line."""
+    kwargs = {}
+    output = None
+    verbose = False
+    args = iter(sys.argv[1:])
+
+    def next_arg(message):
+        """Get the next argument, if missing, die with message."""
+        try:
+            return next(args)
+        except StopIteration:
+            die(message)
+
+    for arg in args:
+        if arg in ('-h', '--help'):
+            sys.stdout.write(__doc__)
+            return 0
+        elif arg in ('-s', '--sizes'):
+            kwargs['sizes'] = [number(n, "size")
+                for n in next_arg("missing sizes").split(',')]
+        elif arg in ('-c', '--corpus'):
+            kwargs['corpus_names'] = names(next_arg("missing corpus names"),
+                corpus.generators, "corpus")
+        elif arg in ('-t', '--stages'):
+            kwargs['stage_names'] = names(next_arg("missing stage names"),
+                stages, "stage")
+        elif arg in ('-r', '--repeat'):
+            kwargs['repeat'] = number(next_arg("missing repeat count"), "repeat count")
+        elif arg == '--seed':
+            try:
+                kwargs['seed'] = int(next_arg("missing seed"))
+            except ValueError:
+                die("invalid seed")
+        elif arg == '--line-cache':
+            kwargs['line_cache'] = True
+        elif arg in ('-o', '--output'):
+            output = next_arg("missing output filename")
+        elif arg in ('-v', '--verbose'):
+            verbose = True
+        else:
+            die("unknown option: " + arg)
+
+    if verbose:
+        kwargs['log'] = lambda message: sys.stderr.write(message + '\n')
+    result = json.dumps(run(**kwargs), indent=2) + '\n'
+    if output:
+        with open(output, 'w') as f:
+            f.write(result)
+    else:
+        sys.stdout.write(result)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,251 @@
+# This file is part of python-ly, https://pypi.python.org/pypi/python-ly
+#
+# Copyright (c) 2015 by Wilbert Berendsen
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 3
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+# See http://www.gnu.org/licenses/ for more information.
+
+"""
+Generate synthetic input documents for the benchmarks.
+
+Every generator is called with the approximate number of lines and a seed,
+and returns the text of a document. The same size and seed always result in
+the same text, so timings can be compared across versions of python-ly.
+
+"""
+
+from __future__ import unicode_literals
+
+import random
+
+
+_pitches = ('c', 'd', 'e', 'f', 'g', 'a', 'b')
+_accidentals = ('', '', '', 'is', 'es')
+_octaves = ('', '', '', "'", ',')
+_durations = ('4', '8', '8', '16', '2', '4.')
+_articulations = ('', '', '', '', '-.', '->', '--', '\\p', '\\f')
+_words = ('lorem', 'ipsum', 'dolor', 'sit', 'amet', 'consectetur',
+          'adipiscing', 'elit', 'sed', 'do', 'eiusmod', 'tempor')
+
+
+def _note(r):
+    """Return a random note, rest or chord."""
+    n = r.random()
+    if n < 0.05:
+        return 'r' + r.choice(_durations)
+    pitch = lambda: r.choice(_pitches) + r.choice(_accidentals) + r.choice(_octaves)
+    if n < 0.15:
+        return '<{0} {1}>{2}'.format(pitch(), pitch(), r.choice(_durations))
+    return pitch() + r.choice(_durations) + r.choice(_articulations)
+
+
+def _music_line(r):
+    """Return a line of music, sometimes with a slur."""
+    notes = [_note(r) for i in range(r.randint(4, 8))]
+    slurrable = [i for i, n in enumerate(notes) if not n.startswith('r')]
+    if len(slurrable) > 1 and r.random() < 0.3:
+        start, end = sorted(r.sample(slurrable, 2))
+        notes[start] += '('
+        notes[end] += ')'
+    return ' '.join(notes) + ' |'
+
+
+def _music(r, lines, indent='  '):
+    """Yield lines with a \\relative music expression."""
+    yield indent + "\\relative c' {"
+    yield indent + "  \\time {0}/4 \\key {1} \\major".format(
+        r.choice((2, 3, 4)), r.choice(_pitches))
+    for i in range(max(1, lines - 3)):
+        if r.random() < 0.05:
+            yield indent + "  \\tuplet 3/2 {{ {0}8 {1} {2} }}".format(
+                *(r.choice(_pitches) for i in range(3)))
+        else:
+            yield indent + '  ' + _music_line(r)
+    yield indent + "}"
+
+
+def _text_line(r):
+    """Return a line of words."""
+    return ' '.join(r.choice(_words) for i in range(r.randint(6, 12)))
+
+
+def lilypond(size, seed=0):
+    """Return a LilyPond document of about size lines.
+
+    It contains a header, some variables with music, and a score
+    with a staff for each music variable.
+
+    """
+    r = random.Random(seed)
+    lines = [
+        '\\version "2.18.0"',
+        '',
+        '\\header {',
+        '  title = "Benchmark"',
+        '  composer = "python-ly"',
+        '}',
+        '',
+    ]
+    names = []
+    per_voice = 40
+    while len(lines) < size - 10 or not names:
+        name = 'voice' + ''.join(r.choice('ABCDEFGH') for i in range(4))
+        names.append(name)
+        lines.append(name + ' = ')
+        lines.extend(_music(r, min(per_voice, max(4, size - len(lines) - 10)), ''))
+        lines.append('')
+    lines.append('\\score {')
+    lines.append('  <<')
+    for name in names:
+        lines.append('    \\new Staff \\' + name)
+    lines.append('  >>')
+    lines.append('  \\layout { }')
+    lines.append('}')
+    lines.append('')
+    return '\n'.join(lines)
+
+
+def latex(size, seed=0):
+    """Return a LaTeX document for lilypond-book of about size lines."""
+    r = random.Random(seed)
+    lines = [
+        '\\documentclass{article}',
+        '\\begin{document}',
+        '',
+    ]
+    while len(lines) < size - 2:
+        n = r.random()
+        if n < 0.3:
+            lines.append('\\begin{lilypond}')
+            lines.extend(_music(r, r.randint(4, 20), ''))
+            lines.append('\\end{lilypond}')
+        elif n < 0.4:
+            lines.append('\\section{{{0}}}'.format(r.choice(_words).title()))
+        elif n < 0.5:
+            lines.append('Inline \\lilypond[fragment]{{ {0} }} {1}.'.format(
+                _music_line(r)[:-2], _text_line(r)))
+        else:
+            lines.append(_text_line(r).capitalize() + '.')
+        lines.append('')
+    lines.append('\\end{document}')
+    lines.append('')
+    return '\n'.join(lines)
+
+
+def html(size, seed=0):
+    """Return an HTML document for lilypond-book of about size lines."""
+    r = random.Random(seed)
+    lines = [
+        '<html>',
+        '<head><title>Benchmark</title></head>',
+        '<body>',
+    ]
+    while len(lines) < size - 2:
+        n = r.random()
+        if n < 0.3:
+            lines.append('<lilypond>')
+            lines.extend(_music(r, r.randint(4, 20), ''))
+            lines.append('</lilypond>')
+        elif n < 0.4:
+            lines.append('<h2>{0}</h2>'.format(r.choice(_words).title()))
+        elif n < 0.5:
+            lines.append('<p>Inline <lilypond fragment>{0}</lilypond> {1}.</p>'.format(
+                _music_line(r)[:-2], _text_line(r)))
+        else:
+            lines.append('<p>{0} <b>{1}</b> {2}.</p>'.format(
+                _text_line(r).capitalize(), r.choice(_words), _text_line(r)))
+    lines.append('</body>')
+    lines.append('</html>')
+    lines.append('')
+    return '\n'.join(lines)
+
+
+def scheme(size, seed=0):
+    """Return a LilyPond include file of about size lines with much Scheme code.
+
+    It contains Scheme function definitions, markup commands and music
+    functions, and some music using them.
+
+    """
+    r = random.Random(seed)
+    lines = [
+        '\\version "2.18.0"',
+        '',
+    ]
+    count = 0
+    while len(lines) < size - 10:
+        count += 1
+        n = r.random()
+        name = '{0}-{1}'.format(r.choice(_words), count)
+        if n < 0.4:
+            lines.extend([
+                '#(define-public ({0} lst n)'.format(name),
+                '   "Return the items of lst, {0}."'.format(_text_line(r)),
+                '   (let loop ((lst lst) (i 0) (result \'()))',
+                '     (cond ((null? lst) (reverse result))',
+                '           ((> i n) (loop (cdr lst) (1+ i) result))',
+                '           (else (loop (cdr lst) (+ i {0}) (cons (car lst) result))))))'.format(
+                    r.randint(1, 9)),
+                '',
+            ])
+        elif n < 0.7:
+            lines.extend([
+                '#(define-markup-command ({0} layout props arg) (markup?)'.format(name),
+                '   #:properties ((thickness 0.{0}) (padding {1}))'.format(
+                    r.randint(1, 9), r.randint(1, 4)),
+                '   (let* ((stencil (interpret-markup layout props arg))',
+                '          (x-ext (ly:stencil-extent stencil X)))',
+                '     (ly:stencil-add stencil',
+                '       (make-line-stencil thickness (car x-ext) 0 (cdr x-ext) 0))))',
+                '',
+            ])
+        else:
+            fname = 'func' + ''.join(r.choice('ABCDEFGH') for i in range(4))
+            lines.extend([
+                fname + ' =',
+                '#(define-music-function (parser location music) (ly:music?)',
+                '   (let ((n {0}))'.format(r.randint(1, 5)),
+                '     #{',
+                '       \\once \\override NoteHead.color = #red',
+                '       ' + _music_line(r),
+                '       $music',
+                '     #}))',
+                '',
+            ])
+    lines.append('music = \\relative c\' {')
+    lines.append('  ' + _music_line(r))
+    lines.append('}')
+    lines.append('')
+    lines.append('\\score { \\music }')
+    lines.append('')
+    return '\n'.join(lines)
+
+
+#: The generators by name.
+generators = {
+    'lilypond': lilypond,
+    'latex': latex,
+    'html': html,
+    'scheme': scheme,
+}
+
+
+#: The mode of the documents each generator creates.
+modes = {
+    'lilypond': 'lilypond',
+    'latex': 'latex',
+    'html': 'html',
+    'scheme': 'lilypond',
+}
@@ -50,6 +50,10 @@ class _command(object):
     def run(self, opts, cursor, output):
         pass
 
+    def finish(self, opts, output):
+        """Called after the command has run on all files."""
+        pass
+
     @staticmethod
     def get_absolute(opts, cursor):
         """Utility function to determine whether the first pitch in a relative should
@@ -108,6 +112,61 @@ class language(_info_command):
         return info.language()
 
 
+class deps(_command):
+    """print the files the files include, as Makefile rules or JSON"""
+    def __init__(self, format='make'):
+        if format not in ('make', 'json'):
+            raise ValueError()
+        self.format = format
+        self.filenames = []
+        self.scanner = None
+
+    def run(self, opts, cursor, output):
+        import ly.deps
+        if self.scanner is None:
+            self.scanner = ly.deps.Scanner(opts.include_path, opts.encoding)
+        filename = cursor.document.filename
+        info = ly.docinfo.DocInfo(cursor.document)
+        self.scanner.add(filename, info.include_args())
+        self.filenames.append(filename)
+
+    def finish(self, opts, output):
+        if self.scanner:
+            self.scanner.scan(self.filenames)
+            for filename in sorted(self.scanner.unreadable):
+                sys.stderr.write('warning: can\'t read included file "{0}"\n'.format(filename))
+            if self.format == 'json':
+                sys.stdout.write(self.scanner.json(self.filenames))
+            else:
+                sys.stdout.write(self.scanner.makefile(self.filenames))
+
+
+class fingerprint(_command):
+    """print a fingerprint of the files and all the files they include"""
+    def __init__(self):
+        self.filenames = []
+        self.scanner = None
+
+    def run(self, opts, cursor, output):
+        import ly.deps
+        if self.scanner is None:
+            self.scanner = ly.deps.Scanner(opts.include_path, opts.encoding,
+                                           fingerprints=True)
+        filename = cursor.document.filename
+        info = ly.docinfo.DocInfo(cursor.document)
+        self.scanner.add(filename, info.include_args(), info.fingerprint())
+        self.filenames.append((filename, opts.with_filename))
+
+    def finish(self, opts, output):
+        if self.scanner:
+            self.scanner.scan(f for f, with_filename in self.filenames)
+            for filename, with_filename in self.filenames:
+                text = self.scanner.fingerprint(filename)
+                if with_filename:
+                    text = filename + ":" + text
+                sys.stdout.write(text + '\n')
+
+
 class _edit_command(_command):
     """a command that edits the source file"""
     pass
@@ -38,6 +38,8 @@ Options
   --output-encoding ENC  output encoding (default to input encoding)
   -l, --language NAME    default pitch name language (default to "nederlands")
   -d <variable=value>    set a variable
+  -I, --include-path DIR add a directory to search included files in
+  --profile-lexer        print statistics about the lexer to standard error
 
 The special option ``--`` considers the remaining arguments to be file names.
 
@@ -74,6 +76,17 @@ change the file:
 
   ``language``
          print the pitch name language, if set in the document
+
+  ``deps [make|json]``
+         print the files the documents include, also indirectly,
+         as Makefile rules (the default) or as JSON. Included files
+         are searched relative to the including file and then in
+         the directories given with ``-I``
+
+  ``fingerprint``
+         print a fingerprint of the document and all files it
+         includes, that only changes when the LilyPond code changes,
+         not when only whitespace or comments are changed
   
 Commands that change the file:
 
@@ -74,6 +74,8 @@ class Options(object):
         self.default_language = "nederlands"
         self.rel_startpitch = True
         self.rel_absolute = None
+        self.profile_lexer = False
+        self.include_path = []
 
         self.indent_width = 2
         self.indent_tabs = False
@@ -209,6 +211,10 @@ def parse_command_line():
         elif arg in ('-l', '--language'):
             s = next_arg("missing language name")
             opts.set_variable("default-language", s)
+        elif arg in ('-I', '--include-path'):
+            opts.include_path.append(next_arg("missing include directory"))
+        elif arg == '--profile-lexer':
+            opts.profile_lexer = True
         elif arg == '--':
             files.extend(args)
         elif arg.startswith('-'):
@@ -267,6 +273,12 @@ def load(filename, encoding, mode):
 def main():
     opts, commands, files = parse_command_line()
     import ly.document
+    if opts.profile_lexer:
+        import ly.lex
+        import ly.slexer
+        # tokenize every line, also when it has been seen before
+        ly.lex.line_cache.resize(0)
+        ly.slexer.profiler.enable()
     output = Output()
     exit_code = 0
     for filename in files:
@@ -280,4 +292,9 @@ def main():
         cursor = ly.document.Cursor(doc)
         for c in commands:
             c.run(options, cursor, output)
+    for c in commands:
+        c.finish(opts, output)
+    if opts.profile_lexer:
+        ly.slexer.profiler.disable()
+        sys.stderr.write(ly.slexer.profiler.report())
     return exit_code
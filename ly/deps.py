@@ -0,0 +1,266 @@
+# This file is part of python-ly, https://pypi.python.org/pypi/python-ly
+#
+# Copyright (c) 2015 by Wilbert Berendsen
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 3
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+# See http://www.gnu.org/licenses/ for more information.
+
+r"""
+Find the files LilyPond documents include.
+
+A Scanner reads the \include commands of files (using
+ly.docinfo.DocInfo.include_args()), and follows them to the files they
+include. The files are read and tokenized in a process pool, and every file
+is read only once, also when it is included by many files::
+
+    import ly.deps
+    s = ly.deps.Scanner(include_path=['/usr/share/lilypond/ly'])
+    s.scan(['score.ly', 'parts.ly'])
+    s.dependencies('score.ly')      # all files score.ly needs
+    s.dependents('common.ily')      # all files that need common.ily
+
+With fingerprints=True, the scanner also computes the fingerprint of every
+file (see ly.docinfo.fingerprint()), and Scanner.fingerprint() combines the
+fingerprints of a file and all the files it includes. It only changes when
+the LilyPond code changes, not when only whitespace or comments change.
+
+The include arguments are resolved the same way ly.music does: first relative
+to the directory of the including file, then in the include path.
+
+"""
+
+from __future__ import unicode_literals
+
+import hashlib
+import io
+import json
+import os
+
+
+def resolve_filename(filename, basedir=None, include_path=()):
+    """Return the full path of an included filename, None if it can't be found.
+
+    The basedir (the directory of the including document) is searched first,
+    then the directories in the include_path.
+
+    """
+    if os.path.isabs(filename):
+        return filename
+    path = list(include_path)
+    if basedir is not None:
+        try:
+            path.remove(basedir)
+        except ValueError:
+            pass
+        path.insert(0, basedir)
+    for p in path:
+        fullpath = os.path.join(p, filename)
+        if os.path.exists(fullpath):
+            return fullpath
+
+
+def include_args(filename, encoding='utf-8'):
+    r"""Return the list of \include arguments of the file.
+
+    Returns None if the file can't be read.
+
+    """
+    return _scan(filename, encoding)[0]
+
+
+def _scan(filename, encoding='utf-8', fingerprint=False):
+    r"""Return a tuple(include_args, fingerprint) for the file.
+
+    The fingerprint is only computed if requested, otherwise it is None.
+    Returns (None, None) if the file can't be read.
+
+    """
+    try:
+        with io.open(filename, encoding=encoding) as f:
+            text = f.read()
+    except (IOError, OSError, UnicodeError):
+        return None, None
+    if not fingerprint and '\\include' not in text:
+        return [], None
+    import ly.document
+    import ly.docinfo
+    info = ly.docinfo.DocInfo(ly.document.Document(text))
+    return info.include_args(), info.fingerprint() if fingerprint else None
+
+
+def _escape(filename):
+    """Escape a filename for use in a Makefile."""
+    return filename.replace('$', '$$').replace(' ', '\\ ').replace('#', '\\#')
+
+
+class Scanner(object):
+    r"""Builds the graph of files including other files.
+
+    After scanning, the includes attribute is a dictionary mapping every
+    scanned filename to the list of the files it includes. The missing
+    attribute maps filenames to the list of \include arguments that could not
+    be found, and unreadable is the set of files that could not be read.
+
+    If fingerprints is True, the fingerprints attribute maps every scanned
+    filename to its ly.docinfo.DocInfo.fingerprint(), and the fingerprint()
+    method combines them for a file and all the files it includes.
+
+    The filenames are normalized with os.path.normpath(). The executor is a
+    concurrent.futures.Executor, by default the process pool returned by
+    ly.util.process_pool().
+
+    """
+    def __init__(self, include_path=(), encoding='utf-8', executor=None,
+                 fingerprints=False):
+        self.include_path = list(include_path)
+        self.encoding = encoding
+        self.executor = executor
+        self.includes = {}
+        self.missing = {}
+        self.unreadable = set()
+        self.fingerprints = {} if fingerprints else None
+
+    def add(self, filename, args, fingerprint=None):
+        r"""Store the \include arguments of a file that was already read.
+
+        If the scanner keeps fingerprints, the fingerprint of the file should
+        also be given. Returns the list of resolved filenames.
+
+        """
+        filename = os.path.normpath(filename)
+        if self.fingerprints is not None:
+            self.fingerprints[filename] = fingerprint
+        basedir = os.path.dirname(filename)
+        if filename == '-':
+            basedir = os.curdir
+        includes = []
+        missing = []
+        for arg in args:
+            resolved = resolve_filename(arg, basedir, self.include_path)
+            if resolved:
+                resolved = os.path.normpath(resolved)
+                if resolved not in includes:
+                    includes.append(resolved)
+            else:
+                missing.append(arg)
+        self.includes[filename] = includes
+        if missing:
+            self.missing[filename] = missing
+        return includes
+
+    def scan(self, filenames):
+        """Scan the files and all the files they include.
+
+        Files that were already scanned are not read again.
+
+        """
+        import concurrent.futures
+        import ly.util
+        executor = self.executor or ly.util.process_pool()
+        futures = {}
+        seen = set()
+
+        def visit(filename):
+            if filename not in seen:
+                seen.add(filename)
+                if filename in self.includes:
+                    for f in self.includes[filename]:
+                        visit(f)
+                else:
+                    # the workers may have another working directory
+                    future = executor.submit(_scan, os.path.abspath(filename),
+                        self.encoding, self.fingerprints is not None)
+                    futures[future] = filename
+
+        for filename in filenames:
+            visit(os.path.normpath(filename))
+        while futures:
+            done, pending = concurrent.futures.wait(futures,
+                return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                filename = futures.pop(future)
+                args, fingerprint = future.result()
+                if args is None:
+                    self.unreadable.add(filename)
+                    args = []
+                for f in self.add(filename, args, fingerprint):
+                    visit(f)
+
+    def dependencies(self, filename):
+        """Return the list of all files the file includes, also indirectly."""
+        result = []
+        seen = set([os.path.normpath(filename)])
+        def visit(filename):
+            for f in self.includes.get(filename, ()):
+                if f not in seen:
+                    seen.add(f)
+                    result.append(f)
+                    visit(f)
+        visit(os.path.normpath(filename))
+        return result
+
+    def dependents(self, filename):
+        """Return the sorted list of all files including the file, also indirectly."""
+        included_by = {}
+        for f, includes in self.includes.items():
+            for i in includes:
+                included_by.setdefault(i, []).append(f)
+        filename = os.path.normpath(filename)
+        result = set()
+        todo = [filename]
+        while todo:
+            for f in included_by.get(todo.pop(), ()):
+                if f not in result:
+                    result.add(f)
+                    todo.append(f)
+        result.discard(filename)
+        return sorted(result)
+
+    def fingerprint(self, filename):
+        """Return a fingerprint of the file and all the files it includes.
+
+        This is a hexadecimal BLAKE2 digest of the fingerprints of the files,
+        and changes only when the LilyPond code of one of them changes, or
+        when another file is included. The scanner must keep fingerprints.
+
+        """
+        h = hashlib.blake2b(digest_size=20)
+        filename = os.path.normpath(filename)
+        for f in [filename] + self.dependencies(filename):
+            h.update((self.fingerprints.get(f) or '-').encode('ascii') + b'\0')
+        return h.hexdigest()
+
+    def makefile(self, filenames):
+        """Return Makefile rules with the files and all files they include.
+
+        Every rule has one of the files as target, and all the files it
+        includes as prerequisites.
+
+        """
+        lines = []
+        for filename in filenames:
+            deps = self.dependencies(filename)
+            lines.append(' '.join([_escape(os.path.normpath(filename)) + ':']
+                                  + [_escape(f) for f in deps]))
+        return ''.join(line + '\n' for line in lines)
+
+    def json(self, filenames):
+        """Return a JSON string describing the files and the includes graph."""
+        return json.dumps({
+            'roots': dict((os.path.normpath(f), self.dependencies(f)) for f in filenames),
+            'includes': self.includes,
+            'missing': self.missing,
+            'unreadable': sorted(self.unreadable),
+        }, indent=2, sort_keys=True) + '\n'
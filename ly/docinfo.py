@@ -26,11 +26,15 @@ from __future__ import unicode_literals
 from __future__ import absolute_import
 
 import re
+import bisect
 import collections
 import functools
+import hashlib
+import heapq
 import itertools
 
 import ly.lex.lilypond
+import ly.lex.scheme
 import ly.pitch
 
 
@@ -49,31 +53,48 @@ def _cache(func):
     return wrapper
 
 
+def fingerprint(tokens):
+    """Return a hexadecimal BLAKE2 digest of the tokens.
+    
+    Whitespace and comments are ignored, so the fingerprint only changes when
+    the LilyPond code changes. Unlike hash(), the fingerprint is the same in
+    every process, so it can be stored and compared later.
+    
+    """
+    h = hashlib.blake2b(digest_size=20)
+    for t in tokens:
+        if not isinstance(t, (ly.lex.Space, ly.lex.Comment)):
+            h.update(t.encode('utf-8', 'surrogatepass') + b'\0')
+    return h.hexdigest()
+
+
 class DocInfo(object):
     """Harvest information from a ly.document.DocumentBase instance.
     
     All tokens are saved in the tokens attribute as a tuple. Newline tokens 
     are added between all lines. All corresponding classes are in the 
     classes attribute as a tuple. This makes quick search and access possible.
+    The first search for a class builds an index mapping every class to the
+    positions of its tokens, so later searches for a class don't scan all
+    tokens.
     
     The tokens are requested from the document using the 
     tokens_with_position() method, so you can always locate them back in the 
     original document using their pos attribute.
     
     DocInfo does not update when the document changes, you should just 
-    instantiate a new one.
+    instantiate a new one, or use IncrementalDocInfo.
     
     """
     def __init__(self, doc):
         """Initialize with ly.document.DocumentBase instance."""
         self._d = doc
-        blocks = iter(doc)
-        for b in blocks:
-            tokens = doc.tokens_with_position(b)
-            self.tokens = sum(map(
-                lambda b: ((ly.lex.Newline('\n', doc.position(b) - 1),) +
-                           doc.tokens_with_position(b)),
-                blocks), tokens)
+        tokens = []
+        for i, b in enumerate(doc):
+            if i:
+                tokens.append(ly.lex.Newline('\n', doc.position(b) - 1))
+            tokens.extend(doc.tokens_with_position(b))
+        self.tokens = tuple(tokens)
         self.classes = tuple(map(type, self.tokens))
     
     @property
@@ -131,25 +152,25 @@ class DocInfo(object):
         found.
         
         """
-        if token is None:
-            try:
-                return self.classes.index(cls, pos, endpos)
-            except ValueError:
-                return -1
-        elif cls is None:
+        if cls is None:
             try:
                 return self.tokens.index(token, pos, endpos)
             except ValueError:
                 return -1
-        else:
-            while True:
-                try:
-                    i = self.tokens.index(token, pos, endpos)
-                except ValueError:
-                    return -1
-                if cls == self.classes[i]:
+        indices = self._index().get(cls)
+        if indices:
+            # pos and endpos behave like the arguments of tuple.index()
+            count = len(self.tokens)
+            if pos < 0:
+                pos += count
+            if endpos < 0:
+                endpos += count
+            for i in itertools.islice(indices, bisect.bisect_left(indices, pos), None):
+                if i >= endpos:
+                    break
+                elif token is None or self.tokens[i] == token:
                     return i
-                pos = i + 1
+        return -1
     
     def find_all(self, token=None, cls=None, pos=0, endpos=-1):
         """Yield all indices of the first specified token and/or class after pos.
@@ -321,6 +342,21 @@ class DocInfo(object):
         return hash(tuple(t for t in self.tokens
                           if not isinstance(t, (ly.lex.Space, ly.lex.Comment))))
     
+    @_cache
+    def fingerprint(self):
+        """Return the fingerprint() of all tokens, a hexadecimal string.
+        
+        Like token_hash(), the fingerprint does not change when only comments
+        or whitespace are changed, but it is the same in every process.
+        
+        """
+        return fingerprint(self.tokens)
+    
+    @_cache
+    def block_fingerprints(self):
+        """Return a list with the fingerprint() of the tokens of every block."""
+        return [fingerprint(self._d.tokens(b)) for b in self._d]
+    
     @_cache
     def complete(self):
         """Return whether the document is probably complete and could be compilable."""
@@ -352,10 +388,248 @@ class DocInfo(object):
         DocInfo instance.
         
         """
-        return sum([issubclass(c, cls) for c in self.classes], False)
+        return sum(len(indices) for c, indices in self._index().items()
+                   if issubclass(c, cls))
 
     def counted_tokens(self):
         """Return a dictionary mapping classes to the number of instances of that class."""
-        return collections.Counter(self.classes)
+        return collections.Counter(dict(
+            (c, len(indices)) for c, indices in self._index().items()))
 
+    def indices(self, cls):
+        """Return the sorted list of indices of the tokens that are (a subclass) of cls."""
+        lists = [indices for c, indices in self._index().items()
+                 if issubclass(c, cls)]
+        if len(lists) == 1:
+            return list(lists[0])
+        return list(heapq.merge(*lists))
 
+    @_cache
+    def _index(self):
+        """Return a dictionary mapping each class to the sorted list of indices of its tokens."""
+        index = {}
+        for i, c in enumerate(self.classes):
+            try:
+                index[c].append(i)
+            except KeyError:
+                index[c] = [i]
+        return index
+
+
+class IncrementalDocInfo(DocInfo):
+    """A DocInfo that keeps itself up-to-date when the document changes.
+    
+    It listens to the changes of the document (see
+    ly.document.DocumentBase.add_listener()), and only requests the tokens of
+    the blocks that got new tokens. The cached results of the other methods
+    are only forgotten when the tokens they look at were changed, so e.g.
+    version() and language() don't look at the tokens again after most
+    changes.
+    
+    The tokens and classes attributes are built again when they are used after
+    a change. The document should notify its listeners of its changes,
+    otherwise use DocInfo.
+    
+    """
+    # the cached methods (with the methods using their result), and the
+    # tokens (text or None, exact class) they search for
+    _dependencies = (
+        (('version_string', 'version'),
+            (("\\version", ly.lex.lilypond.Keyword),)),
+        (('include_args', 'language'),
+            (("\\include", ly.lex.lilypond.Keyword),)),
+        (('language',),
+            (("\\language", ly.lex.lilypond.Keyword),)),
+        (('scheme_load_args',),
+            (("load", ly.lex.scheme.Keyword),)),
+        (('output_args',), (
+            ("output-suffix", ly.lex.scheme.Word),
+            ("\\bookOutputSuffix", ly.lex.lilypond.Command),
+            ("\\bookOutputName", ly.lex.lilypond.Command),
+        )),
+        (('definitions', 'markup_definitions'),
+            ((None, ly.lex.lilypond.Name),)),
+        (('markup_definitions',),
+            (("define-markup-command", ly.lex.scheme.Function),)),
+        (('global_staff_size',),
+            (("set-global-staff-size", ly.lex.scheme.Function),)),
+        (('has_output',), (
+            (None, ly.lex.lilypond.MarkupStart),
+            (None, ly.lex.lilypond.Note),
+            (None, ly.lex.lilypond.Rest),
+            ("\\include", ly.lex.lilypond.Keyword),
+            (None, ly.lex.lilypond.LyricMode),
+        )),
+    )
+    
+    # the methods that return tokens, of which the pos must be moved
+    _positioned = ('definitions', 'markup_definitions')
+    
+    # the methods that depend on all tokens
+    _volatile = ('token_hash', 'fingerprint', 'complete', '_index')
+    
+    # the number of tokens after the searched token the methods look at
+    _window = 10
+    
+    def __init__(self, doc):
+        """Initialize with ly.document.DocumentBase instance."""
+        self._d = doc
+        self._segments = [self._segment(i, b) for i, b in enumerate(doc)]
+        self._moved = len(self._segments)
+        self._tokens = None
+        doc.add_listener(self._update)
+    
+    @property
+    def tokens(self):
+        """All tokens of the document, with Newline tokens between the lines."""
+        if self._tokens is None:
+            self._join()
+        return self._tokens
+    
+    @property
+    def classes(self):
+        """The classes of all tokens."""
+        if self._tokens is None:
+            self._join()
+        return self._classes
+    
+    def range(self, start=0, end=None):
+        """Return a DocInfo for the selected range.
+        
+        The returned DocInfo does not update when the document changes.
+        
+        """
+        n = DocInfo.__new__(DocInfo)
+        n._d = self._d
+        n.tokens = self.tokens
+        n.classes = self.classes
+        return n.range(start, end)
+    
+    def _segment(self, index, block):
+        """Return the tokens of the block, preceded by a Newline if not the first."""
+        tokens = self._d.tokens_with_position(block)
+        if index:
+            return (ly.lex.Newline('\n', self._d.position(block) - 1),) + tokens
+        return tokens
+    
+    def _join(self):
+        """Build the tokens and classes attributes from the segments."""
+        doc = self._d
+        segments = self._segments
+        # get the tokens again of the blocks that moved since they were got
+        # (the first block never moves)
+        moved = max(1, self._moved)
+        if moved < len(segments):
+            for i, block in enumerate(doc.blocks_forward(doc[moved]), moved):
+                if segments[i][0].pos != doc.position(block) - 1:
+                    segments[i] = self._segment(i, block)
+            self._moved = len(segments)
+        self._tokens = tuple(itertools.chain.from_iterable(segments))
+        self._classes = tuple(map(type, self._tokens))
+    
+    def _tokens_before(self, index):
+        """Return at most _window tokens from the segments before index."""
+        result = []
+        while index > 0 and len(result) < self._window:
+            index -= 1
+            result[:0] = (self._segments[index] or ())[-self._window:]
+        return result
+    
+    def _update(self, change):
+        """Called when the document changes, updates the tokens and cache."""
+        doc = self._d
+        segments = self._segments
+        self._tokens = self._classes = None
+        if change.blocks == [(0, len(doc))]:
+            # all tokens changed, e.g. the mode
+            self._cache_ = {}
+            self._segments = [self._segment(i, b) for i, b in enumerate(doc)]
+            self._moved = len(self._segments)
+            return
+        cache = getattr(self, '_cache_', {})
+        self._forget(cache, self._volatile)
+        
+        # the removed tokens and the new tokens, both with the tokens just
+        # before them
+        removed = []
+        added = []
+        dirty = list(change.blocks)
+        # update the fingerprints of the blocks if they were asked for
+        fingerprints = cache.get(DocInfo.block_fingerprints.__wrapped__)
+        if fingerprints is not None:
+            fingerprints = list(fingerprints)
+            cache[DocInfo.block_fingerprints.__wrapped__] = fingerprints
+        for index, count, new in change.splices:
+            removed.append(self._tokens_before(index))
+            removed.extend(segments[index:index+count])
+            segments[index:index+count] = [None] * new
+            if fingerprints is not None:
+                fingerprints[index:index+count] = [None] * new
+            dirty.append((index, index + new))
+        for start, end in change.blocks:
+            removed.append(self._tokens_before(start))
+            removed.extend(filter(None, segments[start:end]))
+        dirty.sort()
+        done = 0
+        for start, end in dirty:
+            start = max(start, done)
+            if start < end:
+                added.append(self._tokens_before(start))
+                blocks = doc.blocks_forward(doc[start])
+                for i, block in zip(range(start, end), blocks):
+                    segments[i] = self._segment(i, block)
+                    added.append(segments[i])
+                    if fingerprints is not None:
+                        fingerprints[i] = fingerprint(segments[i])
+                done = max(done, end)
+        if dirty:
+            # the blocks after the changed ones may have moved
+            self._moved = min(self._moved, dirty[0][0])
+        # move the tokens after the change in the results, forget the results
+        # with tokens in the changed range
+        start, end = change.position, change.position + change.removed
+        delta = change.added - change.removed
+        for name in self._positioned:
+            key = getattr(DocInfo, name).__wrapped__
+            result = cache.get(key)
+            if result and result[-1].pos >= start:
+                if any(start <= t.pos < end for t in result):
+                    del cache[key]
+                else:
+                    cache[key] = [t if t.pos < start else type(t)(t, t.pos + delta)
+                                  for t in result]
+        
+        if cache:
+            removed = self._searchable(removed)
+            added = self._searchable(added)
+            for names, searched in self._dependencies:
+                if names == ('has_output',):
+                    # stays True if output was added, and False if not
+                    result = cache.get(DocInfo.has_output.__wrapped__)
+                    if any(self._contains(added, t, c) for t, c in searched):
+                        if not result:
+                            self._forget(cache, names)
+                    elif result and any(self._contains(removed, t, c)
+                                        for t, c in searched):
+                        self._forget(cache, names)
+                elif any(self._contains(removed, t, c) or self._contains(added, t, c)
+                         for t, c in searched):
+                    self._forget(cache, names)
+    
+    @staticmethod
+    def _searchable(segments):
+        """Return a dictionary mapping the classes of the tokens to sets of the tokens."""
+        result = collections.defaultdict(set)
+        for t in itertools.chain.from_iterable(segments):
+            result[type(t)].add(t)
+        return result
+    
+    @staticmethod
+    def _contains(tokens, token, cls):
+        """Return True if the dictionary from _searchable() has the token."""
+        return cls in tokens and (token is None or token in tokens[cls])
+    
+    def _forget(self, cache, names):
+        """Remove the cached results of the named methods."""
+        for name in names:
+            cache.pop(getattr(DocInfo, name).__wrapped__, None)
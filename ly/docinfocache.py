@@ -0,0 +1,191 @@
+# This file is part of python-ly, https://pypi.python.org/pypi/python-ly
+#
+# Copyright (c) 2015 by Wilbert Berendsen
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 3
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+# See http://www.gnu.org/licenses/ for more information.
+
+r"""
+A persistent cache of the information DocInfo harvests from files.
+
+When scanning many files, e.g. to find the files that use a certain LilyPond
+version or include a certain file, tokenizing every file again is slow. A
+DocInfoCache stores a summary of every file in an SQLite database, and only
+reads and tokenizes the files that changed since they were summarized::
+
+    import ly.docinfocache
+    cache = ly.docinfocache.DocInfoCache()
+    for filename, summary in cache.summaries(filenames).items():
+        if summary and summary.version < (2, 18):
+            print(filename, summary.version_string)
+
+A file is considered unchanged when its modification time and size are the
+same. When they differ but the contents have the same hash, the summary is
+kept too. The cache is emptied when it was written by another version of
+python-ly, because the tokenizer may have changed.
+
+"""
+
+from __future__ import unicode_literals
+
+import collections
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+
+import ly.document
+import ly.docinfo
+import ly.pkginfo
+
+
+#: The information about a file: the mode, version_string() and version(),
+#: language(), include_args(), output_args(), definitions() (as strings) and
+#: global_staff_size() of its DocInfo.
+summary = collections.namedtuple('summary', (
+    'mode',
+    'version_string',
+    'version',
+    'language',
+    'include_args',
+    'output_args',
+    'definitions',
+    'global_staff_size',
+))
+
+
+def summarize(info):
+    """Return the summary of a ly.docinfo.DocInfo instance."""
+    return summary(
+        info.mode(),
+        info.version_string(),
+        info.version(),
+        info.language(),
+        info.include_args(),
+        info.output_args(),
+        [format(t) for t in info.definitions()],
+        info.global_staff_size(),
+    )
+
+
+def _dumps(s):
+    """Return the summary as a JSON string."""
+    return json.dumps(s)
+
+
+def _loads(data):
+    """Return the summary from a JSON string."""
+    s = summary(*json.loads(data))
+    return s._replace(
+        version=tuple(s.version),
+        output_args=[tuple(arg) for arg in s.output_args])
+
+
+def cache_dir():
+    """Return the directory python-ly stores cache files in for this user."""
+    if sys.platform.startswith('win'):
+        base = os.environ.get('LOCALAPPDATA') or os.path.expanduser('~\\AppData\\Local')
+    elif sys.platform == 'darwin':
+        base = os.path.expanduser('~/Library/Caches')
+    else:
+        base = os.environ.get('XDG_CACHE_HOME') or os.path.expanduser('~/.cache')
+    return os.path.join(base, 'python-ly')
+
+
+class DocInfoCache(object):
+    """Stores summaries of files in an SQLite database.
+
+    If no filename is given, the database is docinfo.sqlite in the
+    cache_dir(). Use ":memory:" for a cache that is not stored.
+
+    """
+    def __init__(self, filename=None, encoding='utf-8'):
+        if filename is None:
+            directory = cache_dir()
+            if not os.path.isdir(directory):
+                os.makedirs(directory)
+            filename = os.path.join(directory, 'docinfo.sqlite')
+        self.filename = filename
+        self.encoding = encoding
+        self._db = sqlite3.connect(filename)
+        with self._db:
+            self._db.execute("CREATE TABLE IF NOT EXISTS meta "
+                             "(key TEXT PRIMARY KEY, value TEXT)")
+            self._db.execute("CREATE TABLE IF NOT EXISTS files "
+                             "(path TEXT PRIMARY KEY, mtime INTEGER, "
+                             "size INTEGER, hash TEXT, summary TEXT)")
+            row = self._db.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+            if not row or row[0] != ly.pkginfo.version:
+                self._db.execute("DELETE FROM files")
+                self._db.execute("INSERT OR REPLACE INTO meta VALUES ('version', ?)",
+                                 (ly.pkginfo.version,))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self):
+        """Close the database."""
+        self._db.close()
+
+    def clear(self):
+        """Remove all summaries."""
+        with self._db:
+            self._db.execute("DELETE FROM files")
+
+    def summary(self, filename):
+        """Return the summary of the file, None if it can't be read."""
+        return self.summaries([filename])[filename]
+
+    def summaries(self, filenames):
+        """Return a dictionary mapping every filename to its summary.
+
+        Only the files that changed since they were summarized are read and
+        tokenized. A file that can't be read gets None as its summary.
+
+        """
+        result = {}
+        db = self._db
+        with db:
+            for filename in filenames:
+                path = os.path.abspath(filename)
+                row = db.execute("SELECT mtime, size, hash, summary FROM files "
+                                 "WHERE path = ?", (path,)).fetchone()
+                try:
+                    stat = os.stat(path)
+                    if row and row[:2] == (stat.st_mtime_ns, stat.st_size):
+                        result[filename] = _loads(row[3])
+                        continue
+                    with open(path, 'rb') as f:
+                        data = f.read()
+                except (IOError, OSError):
+                    if row:
+                        db.execute("DELETE FROM files WHERE path = ?", (path,))
+                    result[filename] = None
+                    continue
+                digest = hashlib.blake2b(data, digest_size=16).hexdigest()
+                if row and row[2] == digest:
+                    s = _loads(row[3])
+                else:
+                    text = data.decode(self.encoding, 'replace')
+                    doc = ly.document.Document(text)
+                    s = summarize(ly.docinfo.DocInfo(doc))
+                db.execute("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?)",
+                           (path, stat.st_mtime_ns, stat.st_size, digest, _dumps(s)))
+                result[filename] = s
+        return result
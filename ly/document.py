@@ -49,6 +49,19 @@ source document. It is not expected to have any methods, except that the
 '==' operator is supported between two blocks, and returns True if both
 refer to the same line of text in the source document.
 
+Functions registered with add_listener() are called with a Change instance
+after the document has changed. The Change describes the changed range of
+text, the blocks that were inserted or removed, and the blocks that got new
+tokens, including the blocks after the changed text that were re-tokenized
+because the state at their start changed. This makes it possible to update
+information about a document incrementally, instead of rebuilding it.
+
+
+Change
+======
+
+Describes a change of a Document, passed to the listeners.
+
 
 Cursor
 ======
@@ -74,9 +87,11 @@ from __future__ import unicode_literals
 from __future__ import absolute_import
 
 import io
-import sys
+import array
 import operator
+import itertools
 import collections
+import types
 import weakref
 
 import ly.lex
@@ -109,6 +124,9 @@ class DocumentBase(object):
     blocks_backward
     state
 
+    Implementations that change the text should call _notify() with a Change
+    instance after the change.
+
     You may use the following attributes:
 
     filename (None)   # can represent the filename of the document on disk
@@ -125,6 +143,7 @@ class DocumentBase(object):
         self._writing = 0
         self._changes = collections.defaultdict(list)
         self._cursors = weakref.WeakSet()
+        self._listeners = []
 
     def __bool__(self):
         return True
@@ -151,6 +170,54 @@ class DocumentBase(object):
         """Sets the document contents to the text string."""
         raise NotImplementedError()
 
+    def update_text(self, text):
+        """Change the document contents to the text string, as one change.
+
+        Unlike setplaintext(), only the lines between the lines the old and
+        the new text have in common at the start and at the end are replaced,
+        so the tokens of the other lines are kept, and cursors and listeners
+        are updated like after any change. If the text is the same, nothing
+        changes and the listeners are not called.
+
+        """
+        lines = text.replace('\r', '').split('\n')
+        count = len(self)
+        common = min(count, len(lines))
+        prefix = 0
+        for block, line in zip(self, lines):
+            if self.text(block) != line:
+                break
+            prefix += 1
+        if prefix == count == len(lines):
+            return
+        suffix = 0
+        last = self[count - 1]
+        for block, line in zip(self.blocks_backward(last), reversed(lines)):
+            if suffix == common - prefix or self.text(block) != line:
+                break
+            suffix += 1
+        end = count - suffix    # the first block after the replaced blocks
+        new_end = len(lines) - suffix
+        new = '\n'.join(lines[prefix:new_end])
+        if prefix < end and prefix < new_end:
+            # replace the text of blocks prefix..end
+            start = self.position(self[prefix])
+            block = self[end - 1]
+            self[start:self.position(block) + len(self.text(block))] = new
+        elif prefix < end:
+            # only remove blocks prefix..end
+            start = self.position(self[prefix])
+            if end < count:
+                del self[start:self.position(self[end])]
+            else:
+                del self[start - 1:self.size()]
+        elif end < count:
+            # only insert lines before block end
+            self[self.position(self[end]):self.position(self[end])] = new + '\n'
+        else:
+            # only append lines
+            self[self.size():self.size()] = '\n' + new
+
     def size(self):
         """Return the number of characters in the document."""
         last_block = self[len(self) - 1]
@@ -242,6 +309,37 @@ class DocumentBase(object):
         """
         self._cursors.add(cursor)
 
+    def add_listener(self, func):
+        """Call func with a Change instance after every change of the document.
+
+        If func is a bound method, only a weak reference is kept, so the
+        listening object can be garbage collected without calling
+        remove_listener() first. The listener should not change the document.
+
+        """
+        if isinstance(func, types.MethodType):
+            ref = weakref.WeakMethod(func)
+        else:
+            ref = lambda: func
+        self._listeners.append(ref)
+
+    def remove_listener(self, func):
+        """Stop calling func after changes of the document."""
+        self._listeners = [ref for ref in self._listeners
+                           if ref() not in (func, None)]
+
+    def _notify(self, change):
+        """Call the listeners with the Change instance."""
+        dead = False
+        for ref in self._listeners[:]:
+            func = ref()
+            if func is None:
+                dead = True
+            else:
+                func(change)
+        if dead:
+            self._listeners = [ref for ref in self._listeners if ref() is not None]
+
     def check_changes(self):
         """Debugging method that checks for overlapping edits."""
         pos = self.size()
@@ -279,6 +377,51 @@ class DocumentBase(object):
         """Apply the changes and update the tokens."""
         raise NotImplementedError()
 
+    def _group_changes(self):
+        """Return the changes grouped by the blocks they touch, from the end.
+
+        Returns a list of three-tuples (s_index, e_index, changes), where
+        s_index and e_index are the indices of the first and last block the
+        changes touch, and changes is the list of changes, in the (descending)
+        order of the _changes_list. Changes that touch the same block are in
+        the same group, so an implementation of apply_changes()
+        can rebuild the blocks of every group at once.
+
+        """
+        last = [-1, -1, -1]     # position, end and index of the last found block
+        def index(position):
+            """Return the index of the block at position."""
+            if not last[0] <= position <= last[1]:
+                block = self.block(position)
+                last[0] = pos = self.position(block)
+                last[1] = pos + len(self.text(block))
+                last[2] = self.index(block)
+            return last[2]
+
+        groups = []
+        for change in self._changes_list:
+            start, end = change[:2]
+            s_index = index(start)
+            e_index = len(self) - 1 if end is None else index(end)
+            if groups and e_index >= groups[-1][0]:
+                # add to the group after this change
+                group = groups[-1]
+                group[0] = s_index
+                group[2].append(change)
+                if e_index > group[1]:
+                    group[1] = e_index
+                    while len(groups) > 1 and e_index >= groups[-2][0]:
+                        # the groups after it are touched as well
+                        del groups[-1]
+                        g = groups[-1]
+                        g[0] = s_index
+                        g[1] = max(g[1], e_index)
+                        g[2].extend(group[2])
+                        group = g
+            else:
+                groups.append([s_index, e_index, [change]])
+        return [tuple(g) for g in groups]
+
     def tokens(self, block):
         """Return the tuple of tokens of the specified block.
 
@@ -352,27 +495,70 @@ class Document(DocumentBase):
     The modified attribute is set to True as soon as the document is changed,
     but the setplaintext() method sets it to False.
 
+    If compact is set to True, the tokens of every block are not kept as Token
+    instances, but as compact arrays of token class ids and offsets in the
+    block's text. The Token instances are then created when the tokens() method
+    is called. This saves a lot of memory for large documents, at the cost of
+    some speed when the tokens are requested.
+
+    If lazy is set to True, the text is not tokenized all at once, but only
+    up to the last block of which the tokens or the state are requested. This
+    makes it cheap to load a document and only look at its first lines (e.g.
+    using DocInfo.version()).
+
+    If parallel is set to True, large texts are tokenized using multiple
+    processes (see ly.lex.tokenize_lines()). The tokens are exactly the same.
+
     """
     modified = False
 
-    def __init__(self, text='', mode=None):
+    # the minimal number of lines to tokenize in parallel
+    parallel_threshold = 5000
+
+    def __init__(self, text='', mode=None, compact=False, lazy=False, parallel=False):
         super(Document, self).__init__()
         self._fridge = ly.lex.Fridge()
         self._mode = mode
         self._guessed_mode = None
+        self._compact = compact
+        self._lazy = lazy
+        self._parallel = parallel
+        self._lexed = 0     # the number of blocks that have been tokenized
+        self._blockclass = _CompactBlock if compact else _Block
         self.setplaintext(text)
 
     @classmethod
-    def load(cls, filename, encoding='utf-8', mode=None):
+    def load(cls, filename, encoding='utf-8', mode=None, compact=False,
+             lazy=False, parallel=False):
         """Load the document from a file, using the specified encoding and mode."""
         with io.open(filename, encoding=encoding) as f:
-            doc = cls(f.read(), mode)
+            doc = cls(f.read(), mode, compact, lazy, parallel)
         doc.filename = filename
         return doc
 
     def copy(self):
-        """Return a full copy of the document."""
-        doc = Document(self.plaintext(), self.mode())
+        """Return a full copy of the document.
+
+        The copy shares the blocks with their tokens, and the Fridge with this
+        document, so nothing needs to be tokenized again. When one of the
+        documents is changed, the chunks of blocks it changes are copied first.
+        The blocks of this document remain valid, but blocks you got from the
+        copy may not belong to the copy anymore after one of the documents is
+        changed, so get them again from the copy after a change.
+
+        """
+        doc = Document.__new__(Document)
+        DocumentBase.__init__(doc)
+        doc._fridge = self._fridge
+        doc._mode = self._mode
+        doc._guessed_mode = self._guessed_mode
+        doc._compact = self._compact
+        doc._lazy = self._lazy
+        doc._parallel = self._parallel
+        doc._lexed = self._lexed
+        doc._blockclass = self._blockclass
+        # the blocks that are not yet tokenized are not shared
+        doc._blocks = self._blocks.copy(self._lexed)
         doc.filename = self.filename
         doc.encoding = self.encoding
         doc.modified = self.modified
@@ -386,6 +572,10 @@ class Document(DocumentBase):
         """Return the block at the specified index."""
         return self._blocks[index]
 
+    def __iter__(self):
+        """Iter over all blocks."""
+        return iter(self._blocks)
+
     def setmode(self, mode):
         """Sets the mode to one of the ly.lex modes.
 
@@ -405,30 +595,77 @@ class Document(DocumentBase):
             if mode == self._guessed_mode:
                 return
         self._update_all_tokens()
+        if self._listeners:
+            self._notify(Change(blocks=[(0, len(self._blocks))]))
 
     def mode(self):
         """Return the mode (lilypond, html, etc). None means automatic mode."""
         return self._mode
 
+    def compact(self):
+        """Return True if the tokens are stored in compact form."""
+        return self._compact
+
+    def lazy(self):
+        """Return True if the text is only tokenized when needed."""
+        return self._lazy
+
     def setplaintext(self, text):
         """Set the text of the document, sets modified to False."""
         text = text.replace('\r', '')
         lines = text.split('\n')
-        self._blocks = [_Block(t, n) for n, t in enumerate(lines)]
-        pos = 0
-        for b in self._blocks:
-            b.position = pos
-            pos += len(b.text) + 1
+        if self._listeners:
+            change = Change(0, self._blocks.length() - 1, len(text),
+                [(0, len(self._blocks), len(lines))], [(0, len(lines))])
+        self._blocks = _BlockList(map(self._blockclass, lines))
         if not self._mode:
             self._guessed_mode = ly.lex.guessMode(text)
         self._update_all_tokens()
         self.modified = False
+        if self._listeners:
+            self._notify(change)
 
     def _update_all_tokens(self):
-        state = self.initial_state()
+        self._lexed = 0
+        if self._lazy:
+            # shared blocks may not be copied later, while they are read
+            self._blocks.unshare()
+        else:
+            self._tokenize_until(len(self._blocks) - 1)
+
+    def _tokenize_until(self, index):
+        """Tokenize the blocks that are not yet tokenized, up to index."""
+        lexed = self._lexed
+        if index < lexed:
+            return
+        elif self._parallel and not lexed and index >= self.parallel_threshold:
+            blocks = list(itertools.islice(self._blocks.forward_writable(0), index + 1))
+            result = ly.lex.tokenize_lines([b.text for b in blocks],
+                self._mode or self._guessed_mode)
+            store = self._fridge.store
+            for b, (b.tokens, frozen) in zip(blocks, result):
+                b.state = store(frozen)
+            self._lexed = index + 1
+            return
+        elif lexed:
+            state = self._fridge.thaw(self._blocks[lexed - 1].state)
+        else:
+            state = self.initial_state()
+        frozen = state.freeze()
+        tokenize = ly.lex.line_cache.tokens
+        store = self._fridge.store
+        blocks = self._blocks.forward_writable(lexed)
+        for b in itertools.islice(blocks, index + 1 - lexed):
+            b.tokens, frozen = tokenize(state, b.text, frozen)
+            b.state = store(frozen)
+        self._lexed = index + 1
+
+    def _first_text(self):
+        """Return the text of the first non-blank block, stripped at the left."""
         for b in self._blocks:
-            b.tokens = tuple(state.tokens(b.text))
-            b.state = self._fridge.freeze(state)
+            if b.text and not b.text.isspace():
+                return b.text.lstrip()
+        return ""
 
     def initial_state(self):
         """Return the state at the beginning of the document."""
@@ -436,91 +673,243 @@ class Document(DocumentBase):
 
     def state_end(self, block):
         """Return the state at the end of the specified block."""
+        if self._lexed < len(self._blocks):
+            index = self._blocks.index(block)
+            self._tokenize_until(index)
+            block = self._blocks[index]
         return self._fridge.thaw(block.state)
 
     def block(self, position):
         """Return the text block at the specified character position."""
-        if 0 <= position <= self._blocks[-1].position + len(self._blocks[-1].text):
-            lo = 0
-            hi = len(self._blocks)
-            while lo < hi:
-                mid = (lo + hi) // 2
-                if position < self._blocks[mid].position:
-                    hi = mid
-                else:
-                    lo = mid + 1
-            return self._blocks[lo-1]
+        if 0 <= position < self._blocks.length():
+            return self._blocks.find(position)
 
     def index(self, block):
         """Return the linenumber of the block (starting with 0)."""
-        return block.index
+        return self._blocks.index(block)
 
     def position(self, block):
         """Return the position of the specified block."""
-        return block.position
+        return self._blocks.position(block)
 
     def text(self, block):
         """Return the text of the specified block."""
         return block.text
 
+    def next_block(self, block):
+        """Return the next block, which may be invalid."""
+        return self._blocks.next(block)
+
+    def previous_block(self, block):
+        """Return the previous block, which may be invalid."""
+        return self._blocks.previous(block)
+
+    def blocks_forward(self, block):
+        """Iter forward starting with the specified block."""
+        if self.isvalid(block):
+            return self._blocks.forward(block)
+        return iter(())
+
+    def blocks_backward(self, block):
+        """Iter backwards starting with the specified block."""
+        if self.isvalid(block):
+            return self._blocks.backward(block)
+        return iter(())
+
     def isvalid(self, block):
         """Return True if the block is a valid block."""
         return bool(block)
 
     def tokens(self, block):
         """Return the tuple of tokens of the specified block."""
+        if self._lexed < len(self._blocks):
+            index = self._blocks.index(block)
+            self._tokenize_until(index)
+            block = self._blocks[index]
         return block.tokens
 
+    def tokens_with_position(self, block):
+        """Return a tuple of tokens of the specified block.
+
+        The pos and end attributes of every token point to the position
+        in the Document, instead of to the position in the current block.
+
+        The tuple is cached in the block until the block is re-tokenized or
+        its position changes, so asking it again does not create new tokens.
+        (If the tokens are stored in compact form, they are not cached.)
+        Inside the context for modifying the document, new tuples are not
+        cached: the blocks that are read then are mostly about to change, and
+        keeping all their tokens alive until then only makes the garbage
+        collector work harder.
+
+        """
+        tokens = self.tokens(block)
+        pos = self._blocks.position(block)
+        cached = block.positioned
+        if cached is not None and cached[0] == pos and cached[1] is tokens:
+            return cached[2]
+        result = tuple(type(t)(t, pos + t.pos) for t in tokens)
+        if not self._compact and not self._writing:
+            block.positioned = (pos, tokens, result)
+        return result
+
     def apply_changes(self):
-        for start, end, text in self._changes_list:
-            s = self.block(start)
-            # first remove the old contents
-            if end is None:
-                # all text to the end should be removed
-                s.text = s.text[:start - s.position]
-                del self._blocks[s.index+1:]
+        """Apply the changes and update the tokens.
+
+        The changes are grouped by the blocks they touch. The new text of every
+        group of blocks is built in one go, all groups are put in the block list
+        at once, and then the changed blocks are re-tokenized in one pass. So
+        every block is touched only once, however many changes it got.
+
+        """
+        blocks = self._blocks
+        guess = not self._mode
+        if guess:
+            first = self._first_text()[:2]
+        markers = False
+        truncated = False   # whether tokenized blocks became untokenized
+        edits = []
+        states = []
+        for s_index, e_index, changes in self._group_changes():
+            s = e = blocks[s_index]
+            pos = blocks.position(s)
+            if e_index == s_index:
+                old = s.text
             else:
-                # remove until the end position
-                e = self.block(end)
-                s.text = s.text[:start - s.position] + e.text[end - e.position:]
-                del self._blocks[s.index+1:e.index+1]
-            # now insert the new stuff
-            if text:
-                lines = text.split('\n')
-                lines[-1] += s.text[start - s.position:]
-                s.text = s.text[:start - s.position] + lines[0]
-                self._blocks[s.index+1:s.index+1] = map(_Block, lines[1:])
-            # make sure this line gets reparsed
-            s.tokens = None
-
-        # update the position of all the new blocks
-        pos = s.position
-        for i, b in enumerate(self._blocks[s.index:], s.index):
-            b.index = i
-            b.position = pos
-            pos += len(b.text) + 1
+                touched = list(itertools.islice(blocks.forward(s), e_index - s_index + 1))
+                old = '\n'.join(b.text for b in touched)
+                e = touched[-1]
+            pieces = []
+            cursor = 0
+            for start, end, text in reversed(changes):
+                start -= pos
+                end = len(old) if end is None else end - pos
+                if start < cursor:
+                    # overlapping change, the earlier change wins
+                    if end <= cursor:
+                        continue
+                    start = cursor
+                pieces.append(old[cursor:start])
+                pieces.append(text)
+                cursor = end
+            pieces.append(old[cursor:])
+            new = ''.join(pieces)
+            # see whether the guessed mode could change
+            if guess and not markers:
+                markers = _mode_markers(old) != _mode_markers(new)
+            lines = new.split('\n')
+            # keep track of the tokenized blocks
+            if self._lexed > s_index:
+                if self._lexed > e_index:
+                    self._lexed += len(lines) - 1 - (e_index - s_index)
+                else:
+                    self._lexed = s_index
+                    truncated = True
+            edits.append((s_index, e_index + 1, lines))
+            # the text now ends where the last block ended
+            states.append(e.state)
+
+        size = blocks.length()
+        for new, state in zip(blocks.splice(edits, self._blockclass), states):
+            # make sure these lines get reparsed
+            for b in new:
+                b.tokens = b.state = b.positioned = None
+            new[-1].state = state
+
+        # the splices from the start, with the indices after the change
+        splices = []
+        delta = 0
+        for s_index, e_index, lines in reversed(edits):
+            splices.append((s_index + delta, e_index - s_index, len(lines)))
+            delta += len(lines) - (e_index - s_index)
+
+        if self._listeners:
+            # the range of changed text
+            start = min(start for start, end, text in self._changes_list)
+            end = max(size - 1 if end is None else end
+                      for start, end, text in self._changes_list)
+            change = Change(start, end - start,
+                            end - start + blocks.length() - size, splices)
 
         self.modified = True
 
         # if the initial state has changed, reparse everything
-        if not self._mode:
-            mode = ly.lex.guessMode(self.plaintext())
-            if mode != self._guessed_mode:
-                self._guessed_mode = mode
-                self._update_all_tokens()
-                return
+        if guess:
+            text = self._first_text()[:2]
+            if text != first or (markers and text.startswith(('%', '\\', '<'))):
+                mode = ly.lex.guessMode(self.plaintext())
+                if mode != self._guessed_mode:
+                    self._guessed_mode = mode
+                    self._update_all_tokens()
+                    if self._listeners:
+                        change.blocks = [(0, len(blocks))]
+                        self._notify(change)
+                    return
+
+        dirty = self._retokenize([index for index, removed, added in splices])
+        if not self._lazy:
+            self._tokenize_until(len(blocks) - 1)
+        if self._listeners:
+            dirty.extend((index, index + added)
+                         for index, removed, added in change.splices)
+            if truncated:
+                dirty.append((self._lexed, len(blocks)))
+            change.blocks = _merge_ranges(dirty)
+            self._notify(change)
+
+    def _retokenize(self, changed):
+        """Re-tokenize the changed blocks that already were tokenized.
+
+        changed is the sorted list of the indices of the first block of every
+        range of changed blocks. The blocks following a changed block are also
+        re-tokenized, until the state at the end of a block is the same as
+        before. Returns the list of ranges (start, end) of the indices of the
+        re-tokenized blocks.
 
-        # update the tokens starting at block s
-        state = self.state(s)
-        reparse = False
-        for block in self._blocks[s.index:]:
-            if reparse or block.tokens is None:
-                block.tokens = tuple(state.tokens(block.text))
-                frozen = self._fridge.freeze(state)
+        """
+        blocks = self._blocks
+        tokenize = ly.lex.line_cache.tokens
+        store = self._fridge.store
+        thaw = self._fridge.thaw
+        ranges = []
+        end = 0
+        for index in changed:
+            if index >= self._lexed:
+                break
+            elif index < end:
+                continue
+            start = index
+            # the block before is not changed or already re-tokenized
+            state = thaw(blocks[index - 1].state) if index else self.initial_state()
+            reparse = True
+            for block in itertools.islice(blocks.forward_writable(index), self._lexed - index):
+                if not reparse and block.tokens is not None:
+                    break
+                block.tokens, frozen = tokenize(state, block.text)
+                frozen = store(frozen)
                 reparse = block.state != frozen
                 block.state = frozen
-            else:
-                state = self._fridge.thaw(block.state)
+                index += 1
+            ranges.append((start, index))
+            end = index
+        return ranges
+
+
+def _merge_ranges(ranges):
+    """Return the list of (start, end) ranges sorted, with overlapping ranges merged."""
+    result = []
+    for start, end in sorted(ranges):
+        if result and start <= result[-1][1]:
+            if end > result[-1][1]:
+                result[-1] = (result[-1][0], end)
+        else:
+            result.append((start, end))
+    return result
+
+
+def _mode_markers(text):
+    """Return how many times text contains the strings ly.lex.guessMode() uses."""
+    return tuple(text.count(m) for m in ly.lex._mode.markers)
 
 
 class _Block(object):
@@ -530,13 +919,452 @@ class _Block(object):
 
     """
 
-    position = sys.maxsize  # prevent picking those blocks before updating pos
     state    = None
     tokens   = None
+    positioned = None   # cached tokens_with_position() result
 
-    def __init__(self, text="", index=-1):
+    def __init__(self, text=""):
         self.text = text
-        self.index = index
+
+    def copy(self):
+        """Return a copy of the block, sharing the text, tokens and state."""
+        block = object.__new__(type(self))
+        block.__dict__.update(self.__dict__)
+        return block
+
+
+class _CompactBlock(_Block):
+    """A line of text that stores its tokens in compact form.
+
+    Instead of a tuple of Token instances, the class ids of the tokens and
+    their start and end offsets in the text are stored in arrays. The tokens
+    attribute creates the Token instances again when requested.
+
+    This class is only used by the Document implementation.
+
+    """
+
+    _classes = None
+    _offsets = None
+
+    @property
+    def tokens(self):
+        classes = self._classes
+        if classes is None:
+            return None
+        elif not classes:
+            return ()
+        text = self.text
+        offsets = self._offsets
+        return tuple(_token_classes[c](text[offsets[i]:offsets[i+1]], offsets[i])
+                     for c, i in zip(classes, range(0, len(offsets), 2)))
+
+    @tokens.setter
+    def tokens(self, tokens):
+        if tokens is None:
+            self._classes = self._offsets = None
+        elif not tokens:
+            self._classes = self._offsets = ()
+        else:
+            self._classes = array.array('H', map(_token_class_id, map(type, tokens)))
+            offsets = self._offsets = array.array('L')
+            for t in tokens:
+                offsets.append(t.pos)
+                offsets.append(t.end)
+
+
+# token classes used by compact blocks, and their ids
+_token_classes = []
+_token_class_ids = {}
+
+
+def _token_class_id(cls):
+    """Return the integer id for the Token class, used by compact blocks."""
+    try:
+        return _token_class_ids[cls]
+    except KeyError:
+        i = _token_class_ids[cls] = len(_token_classes)
+        _token_classes.append(cls)
+        return i
+
+
+class _Chunk(object):
+    """A list of consecutive blocks.
+
+    Every block in the chunk gets a chunk attribute pointing to the chunk,
+    a local attribute with its index in the chunk and an offset attribute with
+    its position in the chunk.
+
+    The owner attribute is the token of the _BlockList the blocks belong to;
+    only that list changes the chunk. The sharers attribute is None or a list
+    of weak references to other lists that share the chunk.
+
+    This class is only used by the _BlockList implementation.
+
+    """
+    __slots__ = ('blocks', 'length', 'owner', 'sharers')
+
+    def __init__(self, blocks, owner=None):
+        self.blocks = blocks
+        self.owner = owner
+        self.sharers = None
+        self.update()
+
+    def update(self, start=0):
+        """Update the local index and offset of the blocks from start."""
+        blocks = self.blocks
+        if start:
+            b = blocks[start - 1]
+            pos = b.offset + len(b.text) + 1
+        else:
+            pos = 0
+        for i in range(start, len(blocks)):
+            b = blocks[i]
+            b.chunk = self
+            b.local = i
+            b.offset = pos
+            pos += len(b.text) + 1
+        self.length = pos
+
+
+class _BlockList(object):
+    """A list of blocks that knows the index and position of every block.
+
+    The blocks are divided in chunks. Two Fenwick trees hold the number of
+    blocks and the number of characters of the chunks, so finding the index
+    and position of a block, and finding a block by index or position take
+    logarithmic time in the number of chunks. Changing the text of blocks, and
+    inserting and removing blocks, is done for many ranges of blocks at once
+    using splice(), which only touches the chunks involved, and then renumbers
+    the chunks.
+
+    This class is only used by the Document implementation.
+
+    """
+    chunksize = 512
+
+    def __init__(self, blocks=()):
+        blocks = list(blocks)
+        self._owner = object()
+        self._chunks = self._make_chunks(blocks)
+        self._count = len(blocks)
+        self._reindex()
+
+    def copy(self, end=None):
+        """Return a copy of the list, that shares the chunks with this list.
+
+        The shared chunks keep belonging to the list that owns them, so the
+        blocks of this list remain valid. Before the owner changes a shared
+        chunk, the other lists get a copy of it, and the other lists copy a
+        chunk they don't own before changing it. If end is given, only the
+        chunks with the blocks before index end are shared, and the other
+        chunks are copied right away.
+
+        """
+        if end is None or end >= self._count:
+            n = len(self._chunks)
+        else:
+            n = self._search(self._counts, end)[0]
+        other = _BlockList.__new__(_BlockList)
+        other._owner = object()
+        ref = weakref.ref(other)
+        for chunk in self._chunks[:n]:
+            if chunk.sharers is None:
+                chunk.sharers = [ref]
+            else:
+                chunk.sharers.append(ref)
+        other._chunks = self._chunks[:n] + [_Chunk([b.copy() for b in c.blocks],
+            other._owner) for c in self._chunks[n:]]
+        other._count = self._count
+        other._reindex()
+        return other
+
+    def _make_chunks(self, blocks):
+        """Return a list of chunks of about the same size, holding the blocks."""
+        if not blocks:
+            return []
+        count = -(-len(blocks) // self.chunksize)
+        size = -(-len(blocks) // count)
+        return [_Chunk(blocks[i:i+size], self._owner)
+                for i in range(0, len(blocks), size)]
+
+    def _own(self, n):
+        """Return chunk number n, making sure we may change it."""
+        chunk = self._chunks[n]
+        writable = self._writable(chunk)
+        if writable is not chunk:
+            self._replace(chunk, writable)
+        return writable
+
+    def _writable(self, chunk):
+        """Return the chunk if we own it, otherwise a copy of it we own.
+
+        If we own the chunk, the lists sharing it get a copy of it.
+
+        """
+        if chunk.owner is self._owner:
+            if chunk.sharers:
+                lists = [l for l in (ref() for ref in chunk.sharers)
+                         if l is not None and chunk in l._ordinal]
+                if lists:
+                    # the first of the other lists owns the copy
+                    copy = _Chunk([b.copy() for b in chunk.blocks], lists[0]._owner)
+                    if len(lists) > 1:
+                        copy.sharers = [weakref.ref(l) for l in lists[1:]]
+                    for l in lists:
+                        l._replace(chunk, copy)
+            chunk.sharers = None
+            return chunk
+        if chunk.sharers:
+            chunk.sharers = [ref for ref in chunk.sharers
+                             if ref() is not None and ref() is not self]
+        return _Chunk([b.copy() for b in chunk.blocks], self._owner)
+
+    def _replace(self, chunk, other):
+        """Put the other chunk (with the same blocks) in the place of chunk."""
+        n = self._ordinal.pop(chunk)
+        self._chunks[n] = other
+        self._ordinal[other] = n
+
+    def _reindex(self):
+        """Number the chunks and build the Fenwick trees."""
+        chunks = self._chunks
+        self._ordinal = dict(zip(chunks, range(len(chunks))))
+        n = len(chunks)
+        counts = [0] * (n + 1)
+        lengths = [0] * (n + 1)
+        for i, c in enumerate(chunks, 1):
+            counts[i] += len(c.blocks)
+            lengths[i] += c.length
+            j = i + (i & -i)
+            if j <= n:
+                counts[j] += counts[i]
+                lengths[j] += lengths[i]
+        self._counts = counts
+        self._lengths = lengths
+        self._bit = 1 << (n.bit_length() - 1) if n else 0
+
+    def _prefix(self, tree, i):
+        """Return the sum of the values of the first i chunks in the tree."""
+        total = 0
+        while i > 0:
+            total += tree[i]
+            i -= i & -i
+        return total
+
+    def _search(self, tree, value):
+        """Return the number of the chunk containing the value in the tree.
+
+        Returns a two-tuple (chunk number, sum of the values before it).
+
+        """
+        n = len(tree) - 1
+        pos = total = 0
+        bit = self._bit
+        while bit:
+            i = pos + bit
+            if i <= n and total + tree[i] <= value:
+                pos = i
+                total += tree[i]
+            bit >>= 1
+        return pos, total
+
+    def __len__(self):
+        return self._count
+
+    def __contains__(self, block):
+        return block.chunk in self._ordinal
+
+    def __iter__(self):
+        for chunk in self._chunks:
+            for block in chunk.blocks:
+                yield block
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError("block index out of range")
+        n, total = self._search(self._counts, index)
+        return self._chunks[n].blocks[index - total]
+
+    def length(self):
+        """Return the total number of characters, including the newlines."""
+        return self._prefix(self._lengths, len(self._chunks))
+
+    def index(self, block):
+        """Return the index of the block."""
+        return self._prefix(self._counts, self._ordinal[block.chunk]) + block.local
+
+    def position(self, block):
+        """Return the position of the block."""
+        return self._prefix(self._lengths, self._ordinal[block.chunk]) + block.offset
+
+    def find(self, position):
+        """Return the block containing the position, which must be valid."""
+        n, total = self._search(self._lengths, position)
+        blocks = self._chunks[n].blocks
+        position -= total
+        lo = 0
+        hi = len(blocks)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if position < blocks[mid].offset:
+                hi = mid
+            else:
+                lo = mid + 1
+        return blocks[lo-1]
+
+    def next(self, block):
+        """Return the block after the block, or None."""
+        chunk = block.chunk
+        if block.local < len(chunk.blocks) - 1:
+            return chunk.blocks[block.local + 1]
+        n = self._ordinal[chunk] + 1
+        if n < len(self._chunks):
+            return self._chunks[n].blocks[0]
+
+    def previous(self, block):
+        """Return the block before the block, or None."""
+        if block.local > 0:
+            return block.chunk.blocks[block.local - 1]
+        n = self._ordinal[block.chunk]
+        if n > 0:
+            return self._chunks[n - 1].blocks[-1]
+
+    def forward(self, block):
+        """Yield the blocks, starting with the block."""
+        n = self._ordinal[block.chunk]
+        for b in block.chunk.blocks[block.local:]:
+            yield b
+        for chunk in self._chunks[n+1:]:
+            for b in chunk.blocks:
+                yield b
+
+    def unshare(self):
+        """Copy all chunks that are shared with other lists."""
+        for n in range(len(self._chunks)):
+            self._own(n)
+
+    def forward_writable(self, index):
+        """Yield the blocks, starting at index, that may be changed.
+
+        Shared chunks are copied when they are reached.
+
+        """
+        n, total = self._search(self._counts, index)
+        local = index - total
+        while n < len(self._chunks):
+            for b in self._own(n).blocks[local:]:
+                yield b
+            local = 0
+            n += 1
+
+    def backward(self, block):
+        """Yield the blocks backwards, starting with the block."""
+        n = self._ordinal[block.chunk]
+        for b in block.chunk.blocks[block.local::-1]:
+            yield b
+        for chunk in self._chunks[n-1::-1] if n else ():
+            for b in reversed(chunk.blocks):
+                yield b
+
+    def splice(self, edits, factory):
+        """Change the text of ranges of blocks, all at once.
+
+        edits is a list of three-tuples (start, end, texts), sorted backwards
+        and not overlapping. The blocks from index start to end (not
+        including) get the texts. The existing blocks are reused, and blocks
+        are created using factory(text) or removed when the number of texts
+        differs. All indices point to the blocks as they were before the
+        splice.
+
+        Returns the lists of blocks that got the texts, in the order of the
+        edits.
+
+        """
+        chunks = self._chunks
+        dirty = {}      # chunk -> the local index of the first changed block
+        removed = set()
+        result = []
+        for start, end, texts in edits:
+            n, total = self._search(self._counts, start)
+            last = self._search(self._counts, end - 1)[0]
+            for i in range(n, last + 1):
+                self._own(i)
+            chunk = chunks[n]
+            blocks = chunk.blocks
+            # join the chunks the range extends to (they are not yet changed
+            # before the end of the range because the edits go backwards)
+            for c in chunks[n+1:last+1]:
+                blocks.extend(c.blocks)
+                removed.add(c)
+            local = start - total
+            old = blocks[local:local + end - start]
+            for b, text in zip(old, texts):
+                b.text = text
+            new = old[:len(texts)] + [factory(text) for text in texts[len(old):]]
+            if len(new) != len(old):
+                blocks[local:local + len(old)] = new
+                self._count += len(new) - len(old)
+            dirty[chunk] = local
+            result.append(new)
+        # update the changed chunks, keep them about the same size
+        result_chunks = []
+        for chunk in chunks:
+            if chunk in removed:
+                continue
+            start = dirty.get(chunk)
+            if start is None:
+                result_chunks.append(chunk)
+                continue
+            blocks = chunk.blocks
+            if not blocks:
+                continue
+            elif len(blocks) < self.chunksize // 2 and result_chunks:
+                # merge with the previous chunk
+                chunk = self._writable(result_chunks.pop())
+                start = len(chunk.blocks)
+                blocks = chunk.blocks = chunk.blocks + blocks
+            if len(blocks) > self.chunksize * 2:
+                result_chunks.extend(self._make_chunks(blocks))
+            else:
+                chunk.update(start)
+                result_chunks.append(chunk)
+        self._chunks = result_chunks
+        self._reindex()
+        return result
+
+
+class Change(object):
+    """Describes a change of a Document, passed to its listeners.
+
+    The position, removed and added attributes describe the changed text: at
+    position, removed characters were replaced with added characters. When
+    many changes were made at once, this range contains them all.
+
+    The splices attribute is a list of three-tuples (index, removed, added)
+    describing how the blocks changed: at the block index, removed blocks were
+    replaced with added blocks. The splices are sorted, and every index
+    points to the blocks as they are after the preceding splices.
+
+    The blocks attribute is a sorted list of ranges (start, end) of the indices
+    of the blocks that got new tokens or a new state at their end. Besides the
+    changed blocks, it contains the blocks after them that were re-tokenized
+    because the state at their start changed. If the whole document got new
+    tokens, e.g. because the mode changed, blocks is [(0, len(document))].
+
+    """
+    def __init__(self, position=0, removed=0, added=0, splices=(), blocks=()):
+        self.position = position
+        self.removed = removed
+        self.added = added
+        self.splices = list(splices)
+        self.blocks = list(blocks)
+
+    def __repr__(self):
+        return "<{0} {1}: -{2} +{3} blocks: {4}>".format(type(self).__name__,
+            self.position, self.removed, self.added, self.blocks)
 
 
 class Cursor(object):
@@ -77,6 +77,15 @@ If you don't know the type of text, you can use ly.lex.guessState(text), where
 text is the text you want to parse. A quick heuristic is then used to determine
 the type of the text.
 
+Tokenizing many identical lines (e.g. when loading the same document twice)
+is sped up by the line_cache, a LineCache instance that stores the tokens of
+recently tokenized lines. Use line_cache.info() to get its statistics and
+line_cache.resize(0) to disable it.
+
+Very large texts can be tokenized using multiple processes with the
+tokenize_lines() function. To tokenize a file in a single pass, without
+keeping the text in memory, use stream_tokens().
+
 See for more information the documentation of the slexer module.
 
 """
@@ -88,6 +97,9 @@ import re
 from .. import slexer
 from ._token import *
 from ._mode import extensions, modes, guessMode
+from ._cache import LineCache, line_cache
+from ._parallel import tokenize_lines
+from ._stream import stream_tokens
 
 
 __all__ = [
@@ -96,6 +108,8 @@ __all__ = [
     'Fridge',
     'extensions', 'modes', 'guessMode',
     'state', 'guessState',
+    'LineCache', 'line_cache',
+    'tokenize_lines', 'stream_tokens',
     'Token',
     'Unparsed',
     'Space',
@@ -0,0 +1,120 @@
+# This file is part of python-ly, https://pypi.python.org/pypi/python-ly
+#
+# Copyright (c) 2008 - 2015 by Wilbert Berendsen
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 3
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+# See http://www.gnu.org/licenses/ for more information.
+
+"""
+A cache for the tokens of single lines of text.
+
+Don't use this module directly!
+The LineCache class and the line_cache instance are imported in the ly.lex
+namespace.
+
+"""
+
+from __future__ import unicode_literals
+
+import collections
+import threading
+
+__all__ = ['LineCache', 'line_cache']
+
+
+class LineCache(object):
+    """A size-bounded LRU cache for the tokens of lines of text.
+
+    The tokens of a line of text only depend on the text and on the state
+    at the start of the line. This cache maps the frozen state at the start
+    of the line and the text to the tuple of tokens and the frozen state at the
+    end of the line.
+
+    Documents that contain many identical lines (or identical documents) then
+    only need to be tokenized once.
+
+    Set maxsize to 0 to disable the cache. The cache may be used from
+    multiple threads.
+
+    """
+    def __init__(self, maxsize=10000):
+        self._cache = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+
+    def tokens(self, state, text, frozen=None):
+        """Parse the text using the State and return a two-tuple.
+
+        The two-tuple consists of the tuple of tokens and the frozen state
+        (see State.freeze()) at the end of the text. The state is updated
+        just like calling the tokens() method of the state would do.
+
+        If frozen is given, it must be the frozen form of the state. It is
+        computed if not given.
+
+        """
+        if not self.maxsize:
+            tokens = tuple(state.tokens(text))
+            return tokens, state.freeze()
+        if frozen is None:
+            frozen = state.freeze()
+        key = (frozen, text)
+        cache = self._cache
+        with self._lock:
+            result = cache.get(key)
+            if result is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                cache.move_to_end(key)
+        if result is None:
+            tokens = tuple(state.tokens(text))
+            frozen = state.freeze()
+            with self._lock:
+                cache[key] = (tokens, frozen)
+                while len(cache) > self.maxsize:
+                    cache.popitem(False)
+        else:
+            tokens, frozen = result
+            state.state = [cls.thaw(attrs) for cls, attrs in frozen]
+        return tokens, frozen
+
+    def info(self):
+        """Return a dictionary with the hits, misses, size and maxsize."""
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'size': len(self._cache),
+            'maxsize': self.maxsize,
+        }
+
+    def resize(self, maxsize):
+        """Set the maximum number of cached lines, 0 disables the cache."""
+        with self._lock:
+            self.maxsize = maxsize
+            while len(self._cache) > maxsize:
+                self._cache.popitem(False)
+
+    def clear(self):
+        """Clear the cache and reset the statistics."""
+        with self._lock:
+            self._cache.clear()
+            self.hits = self.misses = 0
+
+
+# the global line cache
+line_cache = LineCache()
@@ -91,6 +91,13 @@ modes = _modes()
 del _modes
 
 
+# strings guessMode() looks for in the whole text
+_lilypond_markers = ('\\version', '\\relative', '\\score')
+_latex_markers = ('\\documentclass', '\\begin{document}')
+_docbook_markers = ('DOCTYPE book', '<programlisting')
+markers = _lilypond_markers + _latex_markers + _docbook_markers
+
+
 def guessMode(text):
     """Tries to guess the type of the input text, using a quite fast heuristic.
 
@@ -99,15 +106,15 @@ def guessMode(text):
     """
     text = text.lstrip()
     if text.startswith(('%', '\\')):
-        if '\\version' in text or '\\relative' in text or '\\score' in text:
+        if any(m in text for m in _lilypond_markers):
             return "lilypond"
-        if "\\documentclass" in text or "\\begin{document}" in text:
+        if any(m in text for m in _latex_markers):
             return "latex"
         return "lilypond"
     if text.startswith("<<"):
         return "lilypond"
     if text.startswith("<"):
-        if 'DOCTYPE book' in text or "<programlisting" in text:
+        if any(m in text for m in _docbook_markers):
             return "docbook"
         else:
             return "html"
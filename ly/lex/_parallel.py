@@ -0,0 +1,127 @@
+# This file is part of python-ly, https://pypi.python.org/pypi/python-ly
+#
+# Copyright (c) 2008 - 2015 by Wilbert Berendsen
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 3
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+# See http://www.gnu.org/licenses/ for more information.
+
+"""
+Tokenize many lines of text using multiple processes.
+
+Don't use this module directly!
+The tokenize_lines function is imported in the ly.lex namespace.
+
+The lines are split in chunks, that are tokenized at the same time in a
+process pool. Every chunk (but the first) starts with a guessed state, the
+initial state of the mode. Afterwards, the chunks are checked in order: if the
+state at the end of the previous chunk differs from the guessed state, the
+lines of the chunk are tokenized again, until the state at the end of a line is
+the same as the state that was found speculatively. This is the same rule
+ly.document.Document uses when re-tokenizing after a change.
+
+So the result is always the same as when the lines are tokenized one after
+another.
+
+"""
+
+from __future__ import unicode_literals
+
+__all__ = ['tokenize_lines']
+
+
+def _tokenize_chunk(frozen, lines):
+    """Tokenize the lines starting with the frozen state.
+
+    This is run in a worker process. Returns a list with a two-tuple per line:
+    a tuple of (Token class, pos, end) tuples and the frozen state at the end
+    of the line. (Tokens can't be pickled themselves.)
+
+    """
+    from . import State
+    state = State.thaw(frozen)
+    result = []
+    for text in lines:
+        tokens = tuple((type(t), t.pos, t.end) for t in state.tokens(text))
+        result.append((tokens, state.freeze()))
+    return result
+
+
+def _boundaries(lines, chunksize):
+    """Yield the start index of every chunk.
+
+    The start of a chunk is moved to a line that is not indented, if possible,
+    so that the initial state is more likely to be the right one.
+
+    """
+    yield 0
+    start = chunksize
+    while start < len(lines):
+        for i in range(start, min(start + 100, len(lines))):
+            text = lines[i]
+            if text and not text[0].isspace():
+                start = i
+                break
+        yield start
+        start += chunksize
+
+
+def tokenize_lines(lines, mode, executor=None, chunksize=1000):
+    """Tokenize the lines (a list of strings) in mode, using multiple processes.
+
+    Returns a list with, for every line, a two-tuple (tokens, frozen): the
+    tuple of tokens and the frozen state (see State.freeze()) at the end of the
+    line. The result is exactly the same as when tokenizing the lines one after
+    another.
+
+    The executor is a concurrent.futures.Executor, by default the process pool
+    returned by ly.util.process_pool().
+    The chunksize is the number of lines tokenized by a single worker.
+
+    """
+    from . import state as _state, State
+    initial = _state(mode).freeze()
+    if len(lines) <= chunksize:
+        return list(_rebuild(lines, _tokenize_chunk(initial, lines)))
+    if executor is None:
+        import ly.util
+        executor = ly.util.process_pool()
+    starts = list(_boundaries(lines, chunksize))
+    ends = starts[1:] + [len(lines)]
+    futures = [executor.submit(_tokenize_chunk, initial, lines[s:e])
+               for s, e in zip(starts, ends)]
+
+    result = []
+    frozen = initial
+    for start, end, future in zip(starts, ends, futures):
+        chunk = future.result()
+        if frozen != initial:
+            # the guess was wrong, re-tokenize until the states match again
+            state = State.thaw(frozen)
+            for i, text in enumerate(lines[start:end]):
+                tokens = tuple((type(t), t.pos, t.end) for t in state.tokens(text))
+                frozen = state.freeze()
+                same = frozen == chunk[i][1]
+                chunk[i] = (tokens, frozen)
+                if same:
+                    break
+        result.extend(_rebuild(lines[start:end], chunk))
+        frozen = chunk[-1][1]
+    return result
+
+
+def _rebuild(lines, chunk):
+    """Yield (tokens, frozen) tuples with Token instances from the chunk."""
+    for text, (tokens, frozen) in zip(lines, chunk):
+        yield tuple(cls(text[pos:end], pos) for cls, pos, end in tokens), frozen
@@ -0,0 +1,108 @@
+# This file is part of python-ly, https://pypi.python.org/pypi/python-ly
+#
+# Copyright (c) 2008 - 2015 by Wilbert Berendsen
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 3
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+# See http://www.gnu.org/licenses/ for more information.
+
+"""
+Tokenize a file in a single pass, without keeping it in memory.
+
+Don't use this module directly!
+The stream_tokens function is imported in the ly.lex namespace.
+
+"""
+
+from __future__ import unicode_literals
+
+import io
+import itertools
+import mmap
+import os
+
+__all__ = ['stream_tokens']
+
+
+# the number of characters to look at when guessing the mode
+GUESS_SIZE = 4096
+
+
+def _lines(source, encoding):
+    """Yield the lines of text, including the newline, from the source."""
+    if isinstance(source, (str, bytes, os.PathLike)):
+        # split only on newlines, and remove carriage returns, like Document
+        with io.open(source, encoding=encoding, newline='\n') as f:
+            for line in f:
+                yield line.replace('\r', '')
+    elif isinstance(source, mmap.mmap):
+        for line in iter(source.readline, b''):
+            yield line.decode(encoding).replace('\r', '')
+    else:
+        # a text file may also split lines on a carriage return
+        pending = ''
+        for line in source:
+            if isinstance(line, bytes):
+                line = line.decode(encoding)
+            line = pending + line.replace('\r', '')
+            if line.endswith('\n'):
+                yield line
+                pending = ''
+            else:
+                pending = line
+        if pending:
+            yield pending
+
+
+def stream_tokens(source, mode=None, encoding='utf-8'):
+    """Yield the tokens from the source, with their position in the file.
+
+    The source may be a filename, a file object (opened in binary mode, or
+    in text mode with newline='' or newline='\\n') or an mmap.mmap object.
+    The text is read and tokenized line by line, so the memory use does not
+    depend on the size of the file.
+
+    Between the lines Newline tokens are yielded, like ly.document.Source does.
+    Carriage returns are removed, like ly.document.Document does.
+    The pos and end attributes of the tokens are the positions in the text
+    (in characters, counting a newline as one character).
+
+    If mode is None, it is guessed from the first few kilobytes of the text,
+    which is not always the same mode ly.lex.guessMode() would return for
+    the whole text.
+
+    """
+    from . import state, guessMode, line_cache, Newline
+    lines = _lines(source, encoding)
+    if mode is None:
+        head = []
+        size = 0
+        for line in lines:
+            head.append(line)
+            size += len(line)
+            if size >= GUESS_SIZE:
+                break
+        mode = guessMode(''.join(head))
+        lines = itertools.chain(head, lines)
+    s = state(mode)
+    tokenize = line_cache.tokens
+    pos = 0
+    for line in lines:
+        text = line[:-1] if line.endswith('\n') else line
+        for t in tokenize(s, text)[0]:
+            yield type(t)(t, pos + t.pos)
+        pos += len(text)
+        if text is not line:
+            yield Newline('\n', pos)
+            pos += 1
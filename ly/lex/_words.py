@@ -0,0 +1,114 @@
+# This file is part of python-ly, https://pypi.python.org/pypi/python-ly
+#
+# Copyright (c) 2008 - 2015 by Wilbert Berendsen
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 3
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+# See http://www.gnu.org/licenses/ for more information.
+
+"""
+The word lists the lexers use to classify commands and Scheme words.
+
+Don't use this module directly!
+The lilypond and scheme lexers use the words instance, which has an
+attribute for every entry in the sources table. The lists in ly.words and
+ly.data are long tuples and lists, so the attributes are frozensets (or a
+dictionary), created on first access.
+
+"""
+
+from __future__ import unicode_literals
+
+import itertools
+
+__all__ = ['Words', 'words']
+
+
+def _from_words(name):
+    """Return a source for the frozenset of the tuple name in ly.words."""
+    def source():
+        from .. import words
+        return frozenset(getattr(words, name))
+    return source
+
+
+def _from_data(name):
+    """Return a source for the frozenset of the list function name in ly.data."""
+    def source():
+        from .. import data
+        return frozenset(getattr(data, name)())
+    return source
+
+
+def _scripts():
+    """Return the frozenset of all script names."""
+    from .. import words
+    return frozenset(itertools.chain(
+        words.articulations,
+        words.ornaments,
+        words.fermatas,
+        words.instrument_scripts,
+        words.repeat_scripts,
+        words.ancient_scripts,
+    ))
+
+
+def _markup_argcount():
+    """Return a dictionary mapping markup commands to their number of arguments."""
+    from .. import words
+    value = {}
+    for argcount in 0, 2, 3, 4, 5:
+        for command in words.markupcommands_nargs[argcount]:
+            value.setdefault(command, argcount)
+    return value
+
+
+# maps every attribute of Words to the function returning its value
+sources = {
+    'lilypond_keywords': _from_words('lilypond_keywords'),
+    'lilypond_music_commands': _from_words('lilypond_music_commands'),
+    'markupcommands': _from_words('markupcommands'),
+    'markup_argcount': _markup_argcount,
+    'scripts': _scripts,
+    'headervariables': _from_words('headervariables'),
+    'papervariables': _from_words('papervariables'),
+    'layoutvariables': _from_words('layoutvariables'),
+    'scheme_keywords': _from_data('scheme_keywords'),
+    'scheme_functions': _from_data('scheme_functions'),
+    'scheme_variables': _from_data('scheme_variables'),
+    'scheme_constants': _from_data('scheme_constants'),
+}
+
+
+class Words(object):
+    """Provides the values from the sources table as attributes.
+
+    A value is created on first access, using the function in the table, and
+    then kept. The test_match() methods of the lexers use this to check
+    whether a word is known with one set lookup, instead of scanning the
+    lists.
+
+    """
+    def __getattr__(self, name):
+        try:
+            source = sources[name]
+        except KeyError:
+            raise AttributeError(name)
+        value = source()
+        setattr(self, name, value)
+        return value
+
+
+# the global instance used by the lexers
+words = Words()
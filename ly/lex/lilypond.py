@@ -27,6 +27,7 @@ import itertools
 
 from . import _token
 from . import Parser, FallthroughParser
+from ._words import words as _words
 
 # an identifier allowing letters and single hyphens in between
 re_identifier = r"[^\W\d_]+([_-][^\W\d_]+)*"
@@ -263,19 +264,7 @@ class ArticulationCommand(Articulation, IdentifierRef):
     @classmethod
     def test_match(cls, match):
         s = match.group()[1:]
-        if '-' not in s:
-            from .. import words
-            for l in (
-                words.articulations,
-                words.ornaments,
-                words.fermatas,
-                words.instrument_scripts,
-                words.repeat_scripts,
-                words.ancient_scripts,
-            ):
-                if s in l:
-                    return True
-        return False
+        return '-' not in s and s in _words.scripts
 
 
 class Direction(_token.Token):
@@ -398,20 +387,14 @@ class Command(_token.Item, IdentifierRef):
     @classmethod
     def test_match(cls, match):
         s = match.group()[1:]
-        if '-' not in s:
-            from .. import words
-            return s in words.lilypond_music_commands
-        return False
+        return '-' not in s and s in _words.lilypond_music_commands
 
 
 class Keyword(_token.Item, IdentifierRef):
     @classmethod
     def test_match(cls, match):
         s = match.group()[1:]
-        if '-' not in s:
-            from .. import words
-            return s in words.lilypond_keywords
-        return False
+        return '-' not in s and s in _words.lilypond_keywords
 
 
 class Specifier(_token.Token):
@@ -499,20 +482,13 @@ class MarkupCommand(Markup, IdentifierRef):
     """A markup command."""
     @classmethod
     def test_match(cls, match):
-        from .. import words
-        return match.group()[1:] in words.markupcommands
+        return match.group()[1:] in _words.markupcommands
 
     def update_state(self, state):
-        from .. import words
-        command = self[1:]
-        if command in words.markupcommands_nargs[0]:
+        argcount = _words.markup_argcount.get(self[1:], 1)
+        if argcount == 0:
             state.endArgument()
         else:
-            for argcount in 2, 3, 4, 5:
-                if command in words.markupcommands_nargs[argcount]:
-                    break
-            else:
-                argcount = 1
             state.enter(ParseMarkup(argcount))
 
 
@@ -828,24 +804,21 @@ class PaperVariable(Variable):
     """A variable inside Paper. Always follow this one by UserVariable."""
     @classmethod
     def test_match(cls, match):
-        from .. import words
-        return match.group() in words.papervariables
+        return match.group() in _words.papervariables
 
 
 class HeaderVariable(Variable):
     """A variable inside Header. Always follow this one by UserVariable."""
     @classmethod
     def test_match(cls, match):
-        from .. import words
-        return match.group() in words.headervariables
+        return match.group() in _words.headervariables
 
 
 class LayoutVariable(Variable):
     """A variable inside Header. Always follow this one by UserVariable."""
     @classmethod
     def test_match(cls, match):
-        from .. import words
-        return match.group() in words.layoutvariables
+        return match.group() in _words.layoutvariables
 
 
 class Chord(_token.Token):
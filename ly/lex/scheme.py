@@ -25,6 +25,7 @@ from __future__ import unicode_literals
 
 from . import _token
 from . import Parser, FallthroughParser
+from ._words import words as _words
 
 
 class Scheme(_token.Token):
@@ -113,29 +114,25 @@ class Word(Scheme, _token.Item):
 class Keyword(Word):
     @classmethod
     def test_match(cls, match):
-        from .. import data
-        return match.group() in data.scheme_keywords()
+        return match.group() in _words.scheme_keywords
 
 
 class Function(Word):
     @classmethod
     def test_match(cls, match):
-        from .. import data
-        return match.group() in data.scheme_functions()
+        return match.group() in _words.scheme_functions
 
 
 class Variable(Word):
     @classmethod
     def test_match(cls, match):
-        from .. import data
-        return match.group() in data.scheme_variables()
+        return match.group() in _words.scheme_variables
 
 
 class Constant(Word):
     @classmethod
     def test_match(cls, match):
-        from .. import data
-        return match.group() in data.scheme_constants()
+        return match.group() in _words.scheme_constants
 
 
 class Number(_token.Item, _token.Numeric):
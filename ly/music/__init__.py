@@ -34,7 +34,8 @@ the music fragment.
 
 Using the Music.events() method and the events module, it is possible to
 iterate in musical time over the music tree, e.g. to convert music to
-another format.
+another format. The event.iter_events() function yields the items in musical
+time order, also when the music has simultaneous parts.
 
 This package is not yet capable to construct documents entirely from scratch.
 This needs to be developed. Until that time, the ly.dom module can be used
@@ -103,7 +104,15 @@ Here is an example::
 import ly.document
 
 
-def document(doc):
-    """Return a music.items.Document instance for the ly.document.Document."""
+def document(doc, lazy=False, include_cache=None):
+    """Return a music.items.Document instance for the ly.document.Document.
+
+    If lazy is True, the contents of music lists, markup and Scheme
+    expressions are only read when they are first needed.
+
+    If include_cache is given, it should be a ly.music.cache.IncludeCache,
+    e.g. ly.music.cache.include_cache, that keeps the included documents.
+
+    """
     from . import items
-    return items.Document(doc)
+    return items.Document(doc, lazy, include_cache)
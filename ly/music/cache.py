@@ -0,0 +1,150 @@
+# This file is part of python-ly, https://pypi.python.org/pypi/python-ly
+#
+# Copyright (c) 2015 by Wilbert Berendsen
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 3
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+# See http://www.gnu.org/licenses/ for more information.
+
+r"""
+A cache for the documents included by ly.music documents.
+
+When many documents include the same files, reading every \include again
+for every document is slow. An IncludeCache keeps the loaded
+ly.document.Document and its music tree for every included file, and
+gives every including document its own copy of the tree::
+
+    import ly.music
+    import ly.music.cache
+    for filename in filenames:
+        doc = ly.document.Document.load(filename)
+        m = ly.music.document(doc, include_cache=ly.music.cache.include_cache)
+        ...
+
+The files are looked up by their full path. A file is loaded again when its
+modification time or size changed. The cached documents are shared, so they
+should not be modified.
+
+The include_cache instance is shared by the whole process. It is safe to use
+it from multiple threads.
+
+"""
+
+from __future__ import unicode_literals
+
+import collections
+import os
+import threading
+
+__all__ = ['IncludeCache', 'include_cache']
+
+
+class IncludeCache(object):
+    """A size-bounded LRU cache for included documents and their music.
+
+    Every entry holds the ly.document.Document loaded from a file and, once
+    it is requested, the music tree read from it (one for every class of
+    ly.music.items.Document used). The music() method returns a copy of the
+    tree, so it can be changed and can get its own include_node.
+
+    Set maxsize to 0 to disable the cache.
+
+    """
+    def __init__(self, maxsize=100):
+        self._cache = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+
+    def _entry(self, filename):
+        """Return the (stamp, document, trees) tuple for the filename."""
+        path = os.path.abspath(filename)
+        stat = os.stat(path)
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            entry = self._cache.get(path)
+            if entry and entry[0] == stamp:
+                self.hits += 1
+                self._cache.move_to_end(path)
+                return entry
+            self.misses += 1
+        import ly.document
+        entry = (stamp, ly.document.Document.load(filename), {})
+        if self.maxsize:
+            with self._lock:
+                self._cache[path] = entry
+                self._cache.move_to_end(path)
+                while len(self._cache) > self.maxsize:
+                    self._cache.popitem(False)
+        return entry
+
+    def document(self, filename):
+        """Return the ly.document.Document for the filename.
+
+        The document is loaded if it is not in the cache or the file has
+        changed. It is shared, so don't modify it.
+
+        """
+        return self._entry(filename)[1]
+
+    def music(self, filename, cls=None):
+        """Return a new music Document for the filename.
+
+        The cls is the ly.music.items.Document (sub)class to use, it is
+        called with the ly.document.Document as the only argument, and gets
+        this cache as include_cache. The returned tree is a copy of the
+        cached tree.
+
+        """
+        if cls is None:
+            from . import items
+            cls = items.Document
+        stamp, doc, trees = self._entry(filename)
+        with self._lock:
+            tree = trees.get(cls)
+        if tree is None:
+            tree = cls(doc)
+            tree.include_cache = self
+            with self._lock:
+                tree = trees.setdefault(cls, tree)
+        node = tree.copy()
+        node.include_path = []
+        return node
+
+    def info(self):
+        """Return a dictionary with the hits, misses, size and maxsize."""
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'size': len(self._cache),
+            'maxsize': self.maxsize,
+        }
+
+    def resize(self, maxsize):
+        """Set the maximum number of cached files, 0 disables the cache."""
+        with self._lock:
+            self.maxsize = maxsize
+            while len(self._cache) > maxsize:
+                self._cache.popitem(False)
+
+    def clear(self):
+        """Clear the cache and reset the statistics."""
+        with self._lock:
+            self._cache.clear()
+            self.hits = self.misses = 0
+
+
+# the global include cache
+include_cache = IncludeCache()
@@ -20,10 +20,18 @@
 """
 Translates a music.items.Document tree into lists of events.
 
+The iter_events() function yields the items of a music tree in musical time
+order, also when the music has simultaneous parts.
+
 """
 
 from __future__ import unicode_literals
 
+import heapq
+import itertools
+
+from . import items
+
 
 class Events(object):
     """Traverses a music tree and records music events from it."""
@@ -38,3 +46,106 @@ class Events(object):
         return node.events(self, time, scaling)
 
 
+class TimeIndexEvents(Events):
+    """Computes times using the time index of the music expressions.
+    
+    The lengths of Music nodes are kept in their time index, so no
+    events are recorded from inside them, and the length of every node is
+    only computed once. The uncached attribute is set to True when a Music
+    node did not keep its time index. If unfold_repeats is True, the time
+    index is not used, because it contains the lengths of folded repeats.
+    
+    If memoize is False, the lengths of the nodes are not remembered, which
+    saves memory if every node is only traversed once.
+    
+    """
+    uncached = False
+    
+    def __init__(self, memoize=True):
+        self.lengths = {} if memoize else None
+    
+    def traverse(self, node, time, scaling):
+        """Return the time after the node."""
+        lengths = self.lengths
+        if lengths is not None and node in lengths:
+            length = lengths[node]
+        else:
+            if isinstance(node, items.Music) and not self.unfold_repeats:
+                length = node._indexed_length()
+                if node._time_index is None:
+                    self.uncached = True
+            else:
+                length = node.events(self, 0, 1)
+            if lengths is not None:
+                lengths[node] = length
+        return time + length * scaling if scaling != 1 else time + length
+
+
+class _Recorder(Events):
+    """Records the nodes the events() method of an item traverses."""
+    def __init__(self, lengths):
+        self.lengths = lengths
+        self.unfold_repeats = lengths.unfold_repeats
+        self.nodes = []
+    
+    def traverse(self, node, time, scaling):
+        """Record the node and return the time after it."""
+        self.nodes.append((time, node, scaling))
+        return self.lengths.traverse(node, time, scaling)
+
+
+def _children(node, time, scaling, lengths):
+    """Yield (time, node, scaling) for the nodes node.events() traverses.
+    
+    Sequential music is handled lazily, for other items the events() method
+    is called with a _Recorder. The lengths is a TimeIndexEvents instance.
+    
+    """
+    events = type(node).events
+    if events is items.Item.events or events is items.Durable.events:
+        return
+    elif (events is items.Music.events
+          or (events is items.MusicList.events and not node.simultaneous)):
+        for child in node:
+            yield time, child, scaling
+            time = lengths.traverse(child, time, scaling)
+    else:
+        r = _Recorder(lengths)
+        node.events(r, time, scaling)
+        for t in r.nodes:
+            yield t
+
+
+def iter_events(node, time=0, scaling=1, unfold_repeats=False):
+    r"""Yield (time, item, scaling) tuples in musical time order.
+    
+    The node itself and all items its events() method traverses (and
+    so on) are yielded, with the same time and scaling Events.traverse()
+    would get. Items at the same time are yielded in the order of their
+    position in the document, so the parts of simultaneous music (and e.g.
+    the music of a \partcombine) are interleaved. (The music a variable
+    refers to comes right after the variable, and repeated music is yielded
+    again at the time it is repeated.)
+    
+    The start times of the items are computed from the lengths of the items
+    before them, which are kept in the time index of the music (see
+    ly.music.items.Music.time_index()). The parts are merged with a heap, so
+    only the current item of every part is kept, not a list of all events.
+    
+    """
+    lengths = TimeIndexEvents(False)
+    lengths.unfold_repeats = unfold_repeats
+    count = itertools.count(1)
+    heap = [(time, node.position, 0, node, scaling, iter(()))]
+    while heap:
+        time, _, _, node, scaling, siblings = heapq.heappop(heap)
+        yield time, node, scaling
+        # a next sibling or child never sorts before the node itself, so it
+        # is enough to only push the next item of every part
+        for t, n, s in siblings:
+            heapq.heappush(heap, (t, n.position, next(count), n, s, siblings))
+            break
+        children = _children(node, time, scaling, lengths)
+        for t, n, s in children:
+            heapq.heappush(heap, (t, n.position, next(count), n, s, children))
+            break
@@ -35,6 +35,10 @@ a Document with the ly.document.Document instance. (It will read all the tokens
 from the document using the Reader from the read module.) As a convenience,
 the ly.music.document(doc) function does this.
 
+With lazy=True, the children of MusicList, Markup, SchemeList and SchemeLily
+items (the Lazy items) are only read when they are first accessed, which
+makes it cheap to look at the toplevel items of a large document.
+
 If you want to add new Item types, you should also add a method to read.Reader
 to construct those items.
 
@@ -51,6 +55,24 @@ from ly.lex import lilypond
 from ly.lex import scheme
 
 
+_slots_cache = {}
+
+# slots copy() leaves unset: a bookmark to read the children, the time index
+# and the document an Include refers to
+_uncopied = ('_bookmark', '_time_index', '_document')
+
+
+def _slots(cls):
+    """Return the names of the slots of the Item subclass cls."""
+    try:
+        return _slots_cache[cls]
+    except KeyError:
+        names = _slots_cache[cls] = tuple(name
+            for c in reversed(cls.__mro__) if issubclass(c, Item)
+            for name in c.__dict__.get('__slots__', ()))
+        return names
+
+
 class Item(ly.node.WeakNode):
     """Represents any item in the music of a document.
     
@@ -62,11 +84,19 @@ class Item(ly.node.WeakNode):
     
     An Item also has a pointer to the Document it originates from.
     
+    Items use __slots__ instead of a __dict__ to save memory, so subclasses
+    should also define __slots__.
+    
     """
-    document = None
-    tokens = ()
-    token = None
-    position = -1
+    __slots__ = ('document', 'token', 'tokens', 'position', '_time_index')
+
+    def __init__(self, parent=None):
+        super(Item, self).__init__(parent)
+        self.document = None
+        self.token = None
+        self.tokens = ()
+        self.position = -1
+        self._time_index = None # see Music.time_index()
 
     def __repr__(self):
         s = ' ' + repr(self.token[:]) if self.token else ''
@@ -94,13 +124,54 @@ class Item(ly.node.WeakNode):
                 # end pos of the last child
                 yield self[-1].end_position()
             # end pos of Item or Token instances in attributes, such as duration etc
-            for i in vars(self).values():
+            for i in self._attribute_values():
                 if isinstance(i, Item):
                     yield i.end_position()
                 elif isinstance(i, lex.Token):
                     yield i.end
         return max(ends())
     
+    def _attribute_values(self):
+        """Yield the values of the attributes that are set."""
+        for name in _slots(type(self)):
+            try:
+                yield getattr(self, name)
+            except AttributeError:
+                pass
+        for value in getattr(self, '__dict__', {}).values():
+            yield value
+
+    def copy(self):
+        """Return a deep copy of the item and its children.
+        
+        Attributes starting with '_' that refer to items, like the specifier
+        of a Repeat, refer to copies of those items in the copy.
+        
+        """
+        node = super(Item, self).copy()
+        for name in _slots(type(self)):
+            if name.startswith('_') and name not in _uncopied:
+                value = getattr(self, name, None)
+                if isinstance(value, ly.node.Node):
+                    if value in self:
+                        value = node[self.index(value)]
+                    else:
+                        value = value.copy()
+                    setattr(node, name, value)
+        return node
+
+    def _copy_attrs(self, node):
+        """Called by copy(); copy the attributes that are set."""
+        node._time_index = None
+        for name in _slots(type(self)):
+            if name not in _uncopied:
+                try:
+                    setattr(node, name, getattr(self, name))
+                except AttributeError:
+                    pass
+        if hasattr(self, '__dict__'):
+            super(Item, self)._copy_attrs(node)
+
     def events(self, e, time, scaling):
         """Let the event.Events instance handle the events. Return the time."""
         return time
@@ -109,6 +180,22 @@ class Item(ly.node.WeakNode):
         """Return the musical duration."""
         return 0
     
+    def forget_time_index(self):
+        """Forget the time index of the music containing this item.
+        
+        See Music.time_index(). Call this after changing e.g. the duration
+        of a note.
+        
+        """
+        self._time_index = None
+        node = self.parent()
+        while node is not None:
+            if node._time_index is not None:
+                node._time_index = None
+            elif isinstance(node, Music):
+                break
+            node = node.parent()
+    
     def iter_toplevel_items(self):
         """Yield the toplevel items of our Document node in backward direction.
         
@@ -215,19 +302,41 @@ class Item(ly.node.WeakNode):
 
 
 class Document(Item):
-    """A toplevel item representing a ly.document.Document."""
+    """A toplevel item representing a ly.document.Document.
+
+    If lazy is True, the contents of music lists, markup and Scheme
+    expressions are only read when they are first needed. They are read from
+    a snapshot of the document taken when the tree is built, so the document
+    may be changed afterwards: the lazy items still get the children that
+    were in the document when the tree was built, just like the items that
+    were read right away.
+
+    If an include_cache (a ly.music.cache.IncludeCache) is given, included
+    documents are taken from it, see get_music().
+
+    Included documents are created with only the ly.document.Document as
+    argument (so subclasses need not accept more), and get the lazy and
+    include_cache attributes afterwards. So they are always read completely.
+
+    """
+    __slots__ = ('lazy', 'include_node', 'include_path', 'relative_includes',
+                 'include_cache')
     
-    def __init__(self, doc):
+    def __init__(self, doc, lazy=False, include_cache=None):
         super(Document, self).__init__()
         self.document = doc
+        self.lazy = lazy
+        self.include_cache = include_cache
         self.include_node = None
         self.include_path = []
         self.relative_includes = True
         import ly.document
+        if lazy:
+            doc = _snapshot(doc)
         c = ly.document.Cursor(doc)
         s = ly.document.Source(c, True, tokens_with_position=True)
         from .read import Reader
-        r = Reader(s)
+        r = Reader(s, lazy)
         self.extend(r.read())
     
     def node(self, position, depth=-1):
@@ -307,15 +416,7 @@ class Document(Item):
         """
         events = self.music_events_til_position(position)
         if events:
-            from . import event
-            e = event.Events()
-            time = 0
-            scaling = 1
-            for parent, nodes, s in events:
-                scaling *= s
-                for n in nodes:
-                    time = e.traverse(n, time, scaling)
-            return time
+            return self._events_time(events)
     
     def time_length(self, start, end):
         """Return the length of the music between start and end positions.
@@ -323,16 +424,6 @@ class Document(Item):
         Returns None if start and end are not in the same expression.
         
         """
-        def mk_list(evts):
-            """Make a flat list of all the events."""
-            l = []
-            scaling = 1
-            for p, nodes, s in evts:
-                scaling *= s
-                for n in nodes:
-                    l.append((n, scaling))
-            return l
-        
         if start > end:
             start, end = end, start
         
@@ -341,26 +432,28 @@ class Document(Item):
             end_evts = self.music_events_til_position(end)
             if end_evts and start_evts[0][0] is end_evts[0][0]:
                 # yes, we have the same toplevel expression.
-                start_evts = mk_list(start_evts)
-                end_evts = mk_list(end_evts)
-                from . import event
-                e = event.Events()
-                time = 0
-                i = 0
-                # traverse the common events only once
-                for i, ((evt, s), (end_evt, end_s)) in enumerate(zip(start_evts, end_evts)):
-                    if evt is end_evt:
-                        time = e.traverse(evt, time, s)
-                    else:
-                        break
-                end_time = time
-                # handle the remaining events for the start position
-                for evt, s in start_evts[i::]:
-                    time = e.traverse(evt, time, s)
-                # handle the remaining events for the end position
-                for evt, s in end_evts[i::]:
-                    end_time = e.traverse(evt, end_time, s)
-                return end_time - time
+                return self._events_time(end_evts) - self._events_time(start_evts)
+    
+    def _events_time(self, events):
+        """Return the time after the events from music_events_til_position().
+        
+        When the nodes are the first children of a Music parent, which is
+        normally the case, the time is looked up in its time_index().
+        
+        """
+        from . import event
+        e = event.TimeIndexEvents()
+        time = 0
+        scaling = 1
+        for parent, nodes, s in events:
+            scaling *= s
+            n = len(nodes)
+            if n and isinstance(parent, Music) and nodes == parent[:n]:
+                time += parent.time_index()[0][n] * scaling
+            else:
+                for node in nodes:
+                    time = e.traverse(node, time, scaling)
+        return time
         
     def substitute_for_node(self, node):
         """Returns a node that replaces the specified node (e.g. in music).
@@ -408,49 +501,132 @@ class Document(Item):
     def resolve_filename(self, filename):
         """Resolve filename against our document and include_path."""
         import os
-        if os.path.isabs(filename):
-            return filename
-        path = list(self.include_path)
+        import ly.deps
+        basedir = None
         if self.document.filename:
             basedir = os.path.dirname(self.document.filename)
-            try:
-                path.remove(basedir)
-            except ValueError:
-                pass
-            path.insert(0, basedir)
-        for p in path:
-            fullpath = os.path.join(p, filename)
-            if os.path.exists(fullpath):
-                return fullpath
+        return ly.deps.resolve_filename(filename, basedir, self.include_path)
     
     def get_music(self, filename):
         """Return the music Document for the specified filename.
         
         This implementation loads a ly.document.Document using utf-8 
-        encoding. Inherit from this class to implement other loading 
-        mechanisms or caching.
+        encoding, or gets the music from the include_cache if we have one.
+        Inherit from this class to implement other loading mechanisms or
+        caching.
         
         """
-        import ly.document
-        return type(self)(ly.document.Document.load(filename))
+        if self.include_cache is not None:
+            node = self.include_cache.music(filename, type(self))
+        else:
+            import ly.document
+            node = type(self)(ly.document.Document.load(filename))
+        node.lazy = self.lazy
+        return node
 
 
 class Token(Item):
     """Any token that is not otherwise recognized""" 
+    __slots__ = ()
 
 
 class Container(Item):
     """An item having a list of child items."""
+    __slots__ = ()
+
+    def _own(self, node):
+        super(Container, self)._own(node)
+        self.forget_time_index()
+
+    def remove(self, node):
+        super(Container, self).remove(node)
+        self.forget_time_index()
+
+    def __delitem__(self, k):
+        super(Container, self).__delitem__(k)
+        self.forget_time_index()
+
+    def unlink(self):
+        super(Container, self).unlink()
+        self.forget_time_index()
+
+    def sort(self, key=None, reverse=False):
+        super(Container, self).sort(key, reverse)
+        self.forget_time_index()
+
+
+def _snapshot(doc):
+    """Return a copy of the document that does not change when doc changes."""
+    import ly.document
+    if isinstance(doc, ly.document.Document):
+        # tokenize doc itself first, so the copy shares all tokens
+        doc.state_end(doc[len(doc) - 1])
+        return doc.copy()
+    return ly.document.Document(doc.plaintext(), doc.initial_state().mode())
+
+
+_node_children = ly.node.Node._children
+
+
+class Lazy(Item):
+    """Base class for items whose children can be read when first needed.
+
+    A Reader in lazy mode does not read the children of such an item, but
+    stores a bookmark. The children are read from the document as soon as
+    they are accessed in any way. (The Document item gives the Reader a
+    snapshot of the document in lazy mode, so this still works after the
+    document has been changed.)
+
+    """
+    __slots__ = ('_bookmark',)
+
+    @property
+    def _children(self):
+        try:
+            return _node_children.__get__(self)
+        except AttributeError:
+            bookmark = self._bookmark
+            del self._bookmark
+            _node_children.__set__(self, [])
+            self.extend(bookmark.read())
+            return _node_children.__get__(self)
+
+    @_children.setter
+    def _children(self, value):
+        _node_children.__set__(self, value)
+
+    def defer(self, bookmark):
+        """Read the children using the bookmark when they are first needed.
+
+        The bookmark must have a read() method returning the children. This
+        is called by the Reader in lazy mode.
+
+        """
+        self._bookmark = bookmark
+        _node_children.__delete__(self)
+
+    def is_read(self):
+        """Return True if the children have been read."""
+        try:
+            _node_children.__get__(self)
+        except AttributeError:
+            return False
+        return True
 
 
 class Duration(Item):
     """A written duration"""
+    __slots__ = ()
 
 
 class Durable(Item):
     """An Item that has a musical duration, in the duration attribute."""
-    duration = 0, 1 # two Fractions: (base, scaling)
-    
+    __slots__ = ('duration',)
+
+    def __init__(self, parent=None):
+        super(Durable, self).__init__(parent)
+        self.duration = 0, 1 # two Fractions: (base, scaling)
+
     def length(self):
         """Return the musical duration (our base * our scaling)."""
         base, scaling = self.duration
@@ -462,40 +638,51 @@ class Durable(Item):
 
 
 class Chord(Durable, Container):
-    pass
+    __slots__ = ()
 
 
 class Unpitched(Durable):
     """A "note" without pitch, just a standalone duration."""
-    pitch = None
+    __slots__ = ('pitch',)
+
+    def __init__(self, parent=None):
+        super(Unpitched, self).__init__(parent)
+        self.pitch = None
 
 
 class Note(Durable):
     """A Note that has a ly.pitch.Pitch"""
-    pitch = None
-    octave_token = None
-    accidental_token = None
-    octavecheck_token = None
+    __slots__ = ('pitch', 'octave_token', 'accidental_token', 'octavecheck_token')
+
+    def __init__(self, parent=None):
+        super(Note, self).__init__(parent)
+        self.pitch = None
+        self.octave_token = None
+        self.accidental_token = None
+        self.octavecheck_token = None
 
 
 class Skip(Durable):
-    pass
+    __slots__ = ()
 
 
 class Rest(Durable):
-    pass
+    __slots__ = ()
 
 
 class Q(Durable):
-    pass
+    __slots__ = ()
 
 
 class DrumNote(Durable):
-    pass
+    __slots__ = ()
 
 
 class Music(Container):
     """Any music expression, to be inherited of."""
+    __slots__ = ()
+    _keep_time_index = True
+    
     def events(self, e, time, scaling):
         """Let the event.Events instance handle the events. Return the time."""
         for node in self:
@@ -504,8 +691,7 @@ class Music(Container):
     
     def length(self):
         """Return the musical duration."""
-        from . import event
-        return event.Events().read(self)
+        return self._indexed_length()
     
     def preceding(self, node=None):
         """Return a two-tuple (nodes, scaling).
@@ -520,11 +706,61 @@ class Music(Container):
         i = self.index(node) if node else None
         return self[:i:], 1
 
+    def time_index(self):
+        """Return a two-tuple (times, length).
+
+        The times list contains for every child the sum of the lengths of
+        the children before it, and then the sum of all lengths. So for
+        the nodes returned by preceding(), the time is times[len(nodes)]
+        multiplied by the scaling. The length is our musical duration.
+
+        The index is built when first requested, and kept until our children
+        or the children of music inside us change. If you change the
+        duration of an item, call forget_time_index() on it.
+        Music referring to variables does not keep its index.
+
+        """
+        index = self._time_index
+        if index is None or index[0] is None:
+            from . import event
+            e = event.TimeIndexEvents()
+            time = 0
+            times = []
+            for node in self:
+                times.append(time)
+                time = e.traverse(node, time, 1)
+            times.append(time)
+            length = index[1] if index else self.events(e, 0, 1)
+            index = times, length
+            if self._keep_time_index and not e.uncached:
+                self._time_index = index
+        return index
+
+    def _indexed_length(self):
+        """Return our length, keeping it in the time index.
+
+        This does not build the list of times, which is only needed for
+        the music the time_index() is requested of.
+
+        """
+        index = self._time_index
+        if index is None:
+            from . import event
+            e = event.TimeIndexEvents()
+            index = None, self.events(e, 0, 1)
+            if self._keep_time_index and not e.uncached:
+                self._time_index = index
+        return index[1]
+
 
-class MusicList(Music):
+class MusicList(Lazy, Music):
     """A music expression, either << >> or { }."""
-    simultaneous = False
-    
+    __slots__ = ('simultaneous',)
+
+    def __init__(self, parent=None):
+        super(MusicList, self).__init__(parent)
+        self.simultaneous = False
+
     def events(self, e, time, scaling):
         """Let the event.Events instance handle the events. Return the time."""
         if self.simultaneous:
@@ -551,6 +787,7 @@ class MusicList(Music):
 
 class Tag(Music):
     r"""A \tag, \keepWithTag or \removeWithTag command."""
+    __slots__ = ()
     
     def events(self, e, time, scaling):
         """Let the event.Events instance handle the events. Return the time."""
@@ -582,11 +819,14 @@ class Scaler(Music):
     The algebraic scaling is stored in the scaling attribute.
     
     """
-    scaling = 1
-    
-    numerator = 0
-    denominator = 0
-    
+    __slots__ = ('scaling', 'numerator', 'denominator', 'duration')
+
+    def __init__(self, parent=None):
+        super(Scaler, self).__init__(parent)
+        self.scaling = 1
+        self.numerator = 0
+        self.denominator = 0
+
     def events(self, e, time, scaling):
         """Let the event.Events instance handle the events. Return the time."""
         return super(Scaler, self).events(e, time, scaling * self.scaling)
@@ -607,6 +847,7 @@ class Scaler(Music):
 
 class Grace(Music):
     """Music that has grace timing, i.e. 0 as far as computation is concerned."""
+    __slots__ = ()
     
     def events(self, e, time, scaling):
         """Let the event.Events instance handle the events. Return the time."""
@@ -632,10 +873,13 @@ class AfterGrace(Music):
     Only the duration of the first is counted.
     
     """
+    __slots__ = ()
 
 
 class PartCombine(Music):
     r"""The \partcombine command with 2 music arguments."""
+    __slots__ = ()
+    
     def events(self, e, time, scaling):
         """Let the event.Events instance handle the events. Return the time."""
         if len(self):
@@ -657,20 +901,28 @@ class PartCombine(Music):
 
 class Relative(Music):
     r"""A \relative music expression. Has one or two children (Note, Music)."""
-    pass
+    __slots__ = ()
 
 
 class Absolute(Music):
     r"""An \absolute music expression. Has one child (normally Music)."""
-    pass
+    __slots__ = ()
 
 
 class Transpose(Music):
     r"""A \transpose music expression. Has normally three children (Note, Note, Music)."""
+    __slots__ = ()
 
 
 class Repeat(Music):
     r"""A \repeat expression."""
+    __slots__ = ('_specifier', '_repeat_count')
+
+    def __init__(self, parent=None):
+        super(Repeat, self).__init__(parent)
+        self._specifier = None
+        self._repeat_count = None
+
     def specifier(self):
         if isinstance(self._specifier, Scheme):
             return self._specifier.get_string()
@@ -715,36 +967,47 @@ class Repeat(Music):
 
 class Alternative(Music):
     r"""An \alternative expression."""
+    __slots__ = ()
 
 
 class InputMode(Music):
     """Base class for inputmode-changing commands."""
+    __slots__ = ()
 
 
 class NoteMode(InputMode):
     r"""A \notemode or \notes expression."""
+    __slots__ = ()
 
 
 class ChordMode(InputMode):
     r"""A \chordmode or \chords expression."""
+    __slots__ = ()
 
 
 class DrumMode(InputMode):
     r"""A \drummode or \drums expression."""
+    __slots__ = ()
 
 
 class FigureMode(InputMode):
     r"""A \figuremode or \figures expression."""
+    __slots__ = ()
 
 
 class LyricMode(InputMode):
     r"""A \lyricmode, \lyrics or \addlyrics expression."""
+    __slots__ = ()
 
 
 class LyricsTo(InputMode):
     r"""A \lyricsto expression."""
-    _context_id = None
-    
+    __slots__ = ('_context_id',)
+
+    def __init__(self, parent=None):
+        super(LyricsTo, self).__init__(parent)
+        self._context_id = None
+
     def context_id(self):
         if isinstance(self._context_id, String):
             return self._context_id.value()
@@ -755,10 +1018,12 @@ class LyricsTo(InputMode):
 
 class LyricText(Durable):
     """A lyric text (word, markup or string), with a Duration."""
+    __slots__ = ()
 
 
 class LyricItem(Item):
     """Another lyric item (skip, extender, hyphen or tie)."""
+    __slots__ = ()
 
 
 class ChordSpecifier(Item):
@@ -767,22 +1032,32 @@ class ChordSpecifier(Item):
     Has children of Note or ChordItem class.
     
     """
+    __slots__ = ()
 
 
 class ChordItem(Item):
     """An item inside a ChordSpecifier, e.g. a number or modifier."""
+    __slots__ = ()
 
 
 class Tremolo(Item):
     """A tremolo item ":". The duration attribute is a tuple (base, scaling)."""
-    duration = 0, 1
+    __slots__ = ('duration',)
+
+    def __init__(self, parent=None):
+        super(Tremolo, self).__init__(parent)
+        self.duration = 0, 1
 
 
 class Translator(Item):
     r"""Base class for a \change, \new, or \context music expression."""
-    _context = None
-    _context_id = None
-    
+    __slots__ = ('_context', '_context_id')
+
+    def __init__(self, parent=None):
+        super(Translator, self).__init__(parent)
+        self._context = None
+        self._context_id = None
+
     def context(self):
         return self._context
     
@@ -795,15 +1070,21 @@ class Translator(Item):
 
 class Context(Translator, Music):
     r"""A \new or \context music expression."""
+    __slots__ = ()
 
 
 class Change(Translator):
     r"""A \change music expression."""
+    __slots__ = ()
 
 
 class Tempo(Item):
-    duration = 0, 1
-    
+    __slots__ = ('duration',)
+
+    def __init__(self, parent=None):
+        super(Tempo, self).__init__(parent)
+        self.duration = 0, 1
+
     def fraction(self):
         """Return the note value as a fraction given before the equal sign."""
         base, scaling = self.duration   # (scaling will normally be 1)
@@ -834,9 +1115,13 @@ class Tempo(Item):
 
 class TimeSignature(Item):
     r"""A \time command."""
-    _num = 4
-    _fraction = Fraction(1, 4)
-    _beatstructure = None
+    __slots__ = ('_num', '_fraction', '_beatstructure')
+
+    def __init__(self, parent=None):
+        super(TimeSignature, self).__init__(parent)
+        self._num = 4
+        self._fraction = Fraction(1, 4)
+        self._beatstructure = None
 
     def measure_length(self):
         """The length of one measure in this time signature as a Fraction."""
@@ -857,7 +1142,11 @@ class TimeSignature(Item):
 
 class Partial(Item):
     r"""A \partial command."""
-    duration = 0, 1
+    __slots__ = ('duration',)
+
+    def __init__(self, parent=None):
+        super(Partial, self).__init__(parent)
+        self.duration = 0, 1
 
     def partial_length(self):
         """Return the duration given as argument as a Fraction."""
@@ -867,16 +1156,22 @@ class Partial(Item):
 
 class Clef(Item):
     r"""A \clef item."""
-    _specifier = None
-    
+    __slots__ = ('_specifier',)
+
+    def __init__(self, parent=None):
+        super(Clef, self).__init__(parent)
+        self._specifier = None
+
     def specifier(self):
         if isinstance(self._specifier, String):
             return self._specifier.value()
         return self._specifier
 
-        
+
 class KeySignature(Item):
     r"""A \key pitch \mode command."""
+    __slots__ = ()
+    
     def pitch(self):
         """The ly.pitch.Pitch that denotes the pitch."""
         for i in self.find(Note):
@@ -890,57 +1185,81 @@ class KeySignature(Item):
 
 class PipeSymbol(Item):
     r"""A pipe symbol: |"""
+    __slots__ = ()
 
 
 class VoiceSeparator(Item):
     r"""A voice separator: \\"""
+    __slots__ = ()
 
 
 class Postfix(Item):
     """Any item that is prefixed with a _, - or ^ direction token."""
+    __slots__ = ('direction',)
 
 
 class Tie(Item):
     """A tie."""
+    __slots__ = ()
 
 
 class Slur(Item):
     """A ( or )."""
-    event = None
+    __slots__ = ('event',)
+
+    def __init__(self, parent=None):
+        super(Slur, self).__init__(parent)
+        self.event = None
 
 
 class PhrasingSlur(Item):
     r"""A \( or \)."""
-    event = None
+    __slots__ = ('event',)
+
+    def __init__(self, parent=None):
+        super(PhrasingSlur, self).__init__(parent)
+        self.event = None
 
 
 class Beam(Item):
     """A [ or ]."""
-    event = None
+    __slots__ = ('event',)
+
+    def __init__(self, parent=None):
+        super(Beam, self).__init__(parent)
+        self.event = None
 
 
 class Dynamic(Item):
     """Any dynamic symbol."""
+    __slots__ = ()
 
 
 class Articulation(Item):
     """An articulation, fingering, string number, or other symbol."""
+    __slots__ = ()
 
 
 class StringTuning(Item):
     r"""A \stringTuning command (with a chord as argument)."""
+    __slots__ = ()
 
 
 class Keyword(Item):
     """A LilyPond keyword."""
+    __slots__ = ()
 
 
 class Command(Item):
     """A LilyPond command."""
+    __slots__ = ()
 
 
 class UserCommand(Music):
     """A user command, most probably referring to music."""
+    __slots__ = ()
+    _keep_time_index = False
+    
     def name(self):
         """Return the name of this user command (without the leading backslash)."""
         return self.token[1:]
@@ -961,6 +1280,8 @@ class UserCommand(Music):
 
 class Version(Item):
     r"""A \version command."""
+    __slots__ = ()
+    
     def version_string(self):
         """The version as a string."""
         for i in self:
@@ -977,6 +1298,8 @@ class Version(Item):
 
 class Include(Item):
     r"""An \include command (not changing the language)."""
+    __slots__ = ('_document',)
+    
     def filename(self):
         """Returns the filename."""
         for i in self:
@@ -988,11 +1311,17 @@ class Include(Item):
 
 class Language(Item):
     r"""A command (\language or certain \include commands) that changes the pitch language."""
-    language = None
+    __slots__ = ('language',)
 
+    def __init__(self, parent=None):
+        super(Language, self).__init__(parent)
+        self.language = None
 
-class Markup(Item):
+
+class Markup(Lazy):
     r"""A command starting markup (\markup, -lines and -list)."""
+    __slots__ = ()
+    
     def plaintext(self):
         """Return the plain text value of this node."""
         return ' '.join(n.plaintext() for n in self)
@@ -1000,6 +1329,8 @@ class Markup(Item):
 
 class MarkupCommand(Item):
     r"""A markup command, such as \italic etc."""
+    __slots__ = ()
+    
     def plaintext(self):
         """Return the plain text value of this node."""
         if self.token == '\\concat':
@@ -1017,6 +1348,8 @@ class MarkupCommand(Item):
 
 class MarkupUserCommand(Item):
     """A user-defined markup command"""
+    __slots__ = ()
+    
     def name(self):
         """Return the name of this user command (without the leading backslash)."""
         return self.token[1:]
@@ -1044,10 +1377,13 @@ class MarkupUserCommand(Item):
 
 class MarkupScore(Item):
     r"""A \score inside Markup."""
+    __slots__ = ()
 
 
 class MarkupList(Item):
     r"""The group of markup items inside { and }. NOTE: *not* a \markuplist."""
+    __slots__ = ()
+    
     def plaintext(self):
         """Return the plain text value of this node."""
         return ' '.join(n.plaintext() for n in self)
@@ -1055,12 +1391,16 @@ class MarkupList(Item):
 
 class MarkupWord(Item):
     """A MarkupWord token."""
+    __slots__ = ()
+    
     def plaintext(self):
         return self.token
 
 
 class Assignment(Item):
     """A variable = value construct."""
+    __slots__ = ()
+    
     def name(self):
         """The variable name."""
         return self.token
@@ -1073,42 +1413,53 @@ class Assignment(Item):
 
 class Book(Container):
     r"""A \book { ... } construct."""
+    __slots__ = ()
 
 
 class BookPart(Container):
     r"""A \bookpart { ... } construct."""
+    __slots__ = ()
 
 
 class Score(Container):
     r"""A \score { ... } construct."""
+    __slots__ = ()
 
 
 class Header(Container):
     r"""A \header { ... } construct."""
+    __slots__ = ()
 
 
 class Paper(Container):
     r"""A \paper { ... } construct."""
+    __slots__ = ()
 
 
 class Layout(Container):
     r"""A \layout { ... } construct."""
+    __slots__ = ()
 
 
 class Midi(Container):
     r"""A \midi { ... } construct."""
+    __slots__ = ()
 
 
 class LayoutContext(Container):
     r"""A \context { ... } construct within Layout or Midi."""
+    __slots__ = ()
 
 
 class With(Container):
     r"""A \with ... construct."""
+    __slots__ = ()
 
 
 class Set(Item):
     r"""A \set command."""
+    __slots__ = ()
+    
     def context(self):
         """The context, if specified."""
         for t in self.tokens:
@@ -1132,6 +1483,8 @@ class Set(Item):
 
 class Unset(Item):
     """An \\unset command."""
+    __slots__ = ()
+    
     def context(self):
         """The context, if specified."""
         for t in self.tokens:
@@ -1150,6 +1503,8 @@ class Unset(Item):
 
 class Override(Item):
     r"""An \override command."""
+    __slots__ = ()
+    
     def context(self):
         for i in self:
             if isinstance(i.token, lilypond.ContextName):
@@ -1163,6 +1518,8 @@ class Override(Item):
 
 class Revert(Item):
     r"""A \revert command."""
+    __slots__ = ()
+    
     def context(self):
         for i in self:
             if isinstance(i.token, lilypond.ContextName):
@@ -1176,14 +1533,17 @@ class Revert(Item):
 
 class Tweak(Item):
     r"""A \tweak command."""
+    __slots__ = ()
 
 
 class PathItem(Item):
     r"""An item in the path of an \override or \revert command."""
+    __slots__ = ()
 
 
 class String(Item):
     """A double-quoted string."""
+    __slots__ = ()
     
     def plaintext(self):
         """Return the plaintext value of this string, without escapes and quotes."""
@@ -1198,6 +1558,8 @@ class String(Item):
 
 class Number(Item):
     """A numerical value, directly entered."""
+    __slots__ = ()
+    
     def value(self):
         if isinstance(self.token, lilypond.IntegerValue):
             return int(self.token)
@@ -1211,6 +1573,8 @@ class Number(Item):
 
 class Scheme(Item):
     """A Scheme expression inside LilyPond."""
+    __slots__ = ()
+    
     def plaintext(self):
         """A crude way to get the plain text in this node."""
         # TEMP use get_string()
@@ -1254,18 +1618,19 @@ class Scheme(Item):
 
 class SchemeItem(Item):
     """Any scheme token."""
+    __slots__ = ()
 
 
-class SchemeList(Container):
+class SchemeList(Lazy, Container):
     """A ( ... ) expression."""
+    __slots__ = ()
 
 
 class SchemeQuote(Item):
     """A ' in scheme."""
+    __slots__ = ()
 
 
-class SchemeLily(Container):
+class SchemeLily(Lazy, Container):
     """A music expression inside #{ and #}."""
-
-
-
+    __slots__ = ()
\ No newline at end of file
@@ -35,15 +35,23 @@ tokens in the 'tokens' attribute, as a tuple.
 The 'end_position()' method returns the position where the node (including 
 its child nodes) ends.
 
+In lazy mode, the Reader does not read the contents of music lists, markup
+and Scheme expressions, but skips their tokens and stores a bookmark in the
+(Lazy) item. The children are read when they are first accessed. This needs
+a Source created with state=True and tokens_with_position=True, as
+items.Document does. The document must not be changed before all lazy items
+have been read; items.Document therefore reads a snapshot of the document.
 
 """
 
 from __future__ import unicode_literals
 from __future__ import division
 
+import functools
 import itertools
 from fractions import Fraction
 
+import ly.document
 import ly.duration
 import ly.pitch
 
@@ -65,6 +73,16 @@ def skip(source, what=(lex.Space, lex.Comment)):
             yield t
 
 
+@functools.lru_cache(maxsize=1024)
+def _duration(texts):
+    """Return the (base, scaling) tuple for the tuple of duration strings.
+    
+    The tuples are cached, so items with the same duration share them.
+    
+    """
+    return ly.duration.base_scaling(texts)
+
+
 class dispatcher(object):
     """Decorator creator to dispatch commands, keywords, etc. to a method."""
     def __init__(self):
@@ -119,17 +137,38 @@ class Reader(object):
     _markup = dispatcher_class()
     _scheme = dispatcher_class()
     
-    def __init__(self, source):
+    def __init__(self, source, lazy=False):
         """Initialize with a ly.document.Source.
         
-        The language is set to "nederlands".
+        The language is set to "nederlands". If lazy is True, the children
+        of Lazy items are only read when they are first needed.
         
         """
         self.source = source
+        self.lazy = lazy
         self.language = "nederlands"
         self.in_chord = False
         self.prev_duration = Fraction(1, 4), 1
     
+    @property
+    def prev_duration(self):
+        """The last read duration, used for items without a written duration.
+        
+        In lazy mode, a skipped item containing durations is read first when
+        needed.
+        
+        """
+        while self._pending:
+            bookmark = self._pending
+            len(bookmark.item)  # reads the children if not yet done
+            self._prev_duration, self._pending = bookmark.duration
+        return self._prev_duration
+    
+    @prev_duration.setter
+    def prev_duration(self, value):
+        self._prev_duration = value
+        self._pending = None
+    
     def set_language(self, lang):
         r"""Changes the pitch name language to use.
         
@@ -167,7 +206,8 @@ class Reader(object):
             d = self.factory(Duration, tokens[0])
             d.tokens = tuple(tokens[1:])
             item.append(d)
-            item.duration = self.prev_duration = ly.duration.base_scaling(tokens)
+            duration = _duration(tuple(map(str, tokens)))
+            item.duration = self.prev_duration = duration
         else:
             item.duration = self.prev_duration
     
@@ -183,6 +223,34 @@ class Reader(object):
         if last_token and t is not None:
             last_token(t)
 
+    def add_children(self, item, source, read):
+        """Add the children read by read(self, source) to the Lazy item.
+        
+        In lazy mode, the tokens from source are skipped and a bookmark is
+        stored in the item, so the children are read when first needed.
+        When the skipped tokens contain durations, the prev_duration is
+        resolved only when needed; when they (may) change the language, the
+        children are read immediately.
+        
+        """
+        if not self.lazy:
+            item.extend(read(self, source))
+            return
+        bookmark = Bookmark(self, item, read)
+        durations = language = False
+        for t in source:
+            if isinstance(t, lilypond.Duration):
+                durations = True
+            elif isinstance(t, lilypond.Keyword) and t in ('\\language', '\\include'):
+                language = True
+        item.defer(bookmark)
+        if language:
+            len(item)
+            self.language = bookmark.language
+            self._prev_duration, self._pending = bookmark.duration
+        elif durations:
+            self._pending = bookmark
+    
     def factory(self, cls, token=None, consume=False, position=None):
         """Create Item instance for token.
         
@@ -284,7 +352,7 @@ class Reader(object):
         item, it = self.test_music_list(t)
         if item:
             if it:
-                item.extend(self.read(it))
+                self.add_children(item, it, Reader.read)
             return item
     
     @_tokencls(lilypond.Command)
@@ -985,8 +1053,15 @@ class Reader(object):
     @_commands('\\markup', '\\markuplist', '\\markuplines')
     def handle_markup(self, t, source=None):
         item = self.factory(Markup, t)
-        self.add_markup_arguments(item)
+        self.add_children(item, self.consume(), Reader.read_markup_items)
         return item
+    
+    def read_markup_items(self, source):
+        """Yield the markup items read from source."""
+        for t in source:
+            i = self.read_markup(t)
+            if i:
+                yield i
         
     def read_markup(self, t):
         """Read LilyPond markup (recursively)."""
@@ -1071,12 +1146,16 @@ class Reader(object):
     def handle_scheme_open_parenthesis(self, t):
         item = self.factory(SchemeList, t)
         def last(t): item.tokens = (t,)
-        for t in self.consume(last):
+        self.add_children(item, self.consume(last), Reader.read_scheme_items)
+        return item
+    
+    def read_scheme_items(self, source):
+        """Yield the Scheme items read from source."""
+        for t in source:
             if not isinstance(t, lex.Space):
                 i = self.read_scheme(t)
                 if i:
-                    item.append(i)
-        return item
+                    yield i
     
     @_scheme(
         scheme.Dot,
@@ -1094,7 +1173,38 @@ class Reader(object):
     def handle_scheme_lilypond_start(self, t):
         item = self.factory(SchemeLily, t)
         def last(t): item.tokens = (t,)
-        item.extend(self.read(self.consume(last)))
+        self.add_children(item, self.consume(last), Reader.read)
         return item
 
 
+class Bookmark(object):
+    """Remembers where and how to read the children of a Lazy item.
+    
+    Stores the position of the last token read so far (e.g. the opening
+    bracket) and the state of the Reader. After read(), the language and
+    duration attributes contain the state of the Reader after reading the
+    children.
+    
+    """
+    def __init__(self, reader, item, read):
+        self.item = item
+        self.func = read
+        self.document = reader.source.document
+        self.position = reader.source.token().pos
+        self.language = reader.language
+        self.in_chord = reader.in_chord
+        self.duration = reader._prev_duration, reader._pending
+    
+    def read(self):
+        """Read and return the children of the item."""
+        cursor = ly.document.Cursor(self.document, self.position)
+        source = ly.document.Source(cursor, True, tokens_with_position=True)
+        next(source) # the last token, so the state is the same as when skipped
+        reader = Reader(source, True)
+        reader.language = self.language
+        reader.in_chord = self.in_chord
+        reader._prev_duration, reader._pending = self.duration
+        children = list(self.func(reader, reader.consume()))
+        self.language = reader.language
+        self.duration = reader._prev_duration, reader._pending
+        return children
@@ -127,9 +127,11 @@ except NameError:
     pass
 
 import re
+import sys
+import time
 
 
-__all__ = ['Token', 'Parser', 'FallthroughParser', 'State', 'Fridge']
+__all__ = ['Token', 'Parser', 'FallthroughParser', 'State', 'Fridge', 'Profiler']
 
 
 class State(object):
@@ -334,8 +336,8 @@ class PatternProperty(object):
     """
     def __get__(self, instance, owner):
         try:
-            owner.pattern = self.pattern
             owner.index = self.index
+            owner.pattern = self.pattern
         except AttributeError:
             # if Token classes have the same regexp string, group them
             patterns = []
@@ -348,14 +350,18 @@ class PatternProperty(object):
                     counter[rx] = [cls]
                     patterns.append(rx)
             # make the pattern
-            owner.pattern = self.pattern = pattern = re.compile("|".join(
+            pattern = re.compile("|".join(
                 "(?P<g_{0}>{1})".format(i, rx)
                 for i, rx in enumerate(patterns)), owner.re_flags)
             # make a fast mapping list from matchObj.lastindex to the token class
             indices = sorted(v for k, v in pattern.groupindex.items() if k.startswith('g_'))
-            owner.index = self.index = index = [None] * (indices[-1] + 1)
+            index = [None] * (indices[-1] + 1)
             for i, rx in zip(indices, patterns):
                 index[i] = counter[rx]
+            # set the complete index before the pattern, as other threads may
+            # use the pattern as soon as it is set in the class
+            owner.index = self.index = index
+            owner.pattern = self.pattern = pattern
         return owner.pattern
 
 
@@ -477,29 +483,230 @@ class FallthroughParser(Parser):
 
 
 class Fridge(object):
-    """Stores frozen States under an integer number."""
+    """Stores frozen States under an integer number.
+
+    Storing and looking up a state is done using dictionaries, so it does not
+    become slower when many different states are stored.
+
+    The stored states are kept as a tree: every number refers to a parser and
+    the number of the state containing the parsers below it. So states with the
+    same outer parsers share them, and every distinct parser state is stored
+    only once.
+
+    """
     def __init__(self, stateClass = State):
         self._stateClass = stateClass
-        self._states = []
+        self._frames = {}       # interned (Parser class, attrs) tuples
+        self._numbers = {}      # (parent number, frame) -> number
+        self._nodes = []        # number -> (parent number, frame)
+        self._thawed = {}       # number -> cached frozen state tuple
+        self._stored = set()    # the numbers of the stored states
 
     def freeze(self, state):
         """Stores a state and return an identifying integer."""
-        frozen = state.freeze()
+        return self.store(state.freeze())
+
+    def store(self, frozen):
+        """Stores an already frozen state and return an identifying integer."""
+        num = -1
+        numbers = self._numbers
+        for frame in frozen:
+            try:
+                num = numbers[num, frame]
+            except KeyError:
+                frame = self._frames.setdefault(frame, frame)
+                node = (num, frame)
+                num = numbers[node] = len(self._nodes)
+                self._nodes.append(node)
+        self._stored.add(num)
+        return num
+
+    def frozen(self, num):
+        """Returns the frozen state (see State.freeze()) stored under num."""
         try:
-            return self._states.index(frozen)
-        except ValueError:
-            i = len(self._states)
-            self._states.append(frozen)
-            return i
+            return self._thawed[num]
+        except KeyError:
+            if not 0 <= num < len(self._nodes):
+                return
+            frames = []
+            n = num
+            while n != -1:
+                n, frame = self._nodes[n]
+                frames.append(frame)
+            frozen = self._thawed[num] = tuple(reversed(frames))
+            return frozen
 
     def thaw(self, num):
-        """Returns the state stored under the specified number."""
-        if 0 <= num < len(self._states):
-            return self._stateClass.thaw(self._states[num])
+        """Returns the state stored under the specified number.
+
+        The frozen state is cached (see frozen()), but the returned State
+        gets new Parser instances: parsers may change while tokenizing (e.g.
+        their argcount), so they can't be shared between states.
+
+        """
+        frozen = self.frozen(num)
+        if frozen is not None:
+            return self._stateClass.thaw(frozen)
 
     def count(self):
-        """Returns the number of stored frozen states."""
-        return len(self._states)
+        """Returns the number of distinct stored frozen states."""
+        return len(self._stored)
+
+    def count_nodes(self):
+        """Returns the number of nodes in the tree of stored states.
+
+        Besides the stored states, this includes the states that consist of
+        the outer parsers of the stored states.
+
+        """
+        return len(self._nodes)
+
+    def memory(self):
+        """Returns the approximate number of bytes used to store the states."""
+        size = sys.getsizeof
+        total = (size(self._frames) + size(self._numbers) + size(self._nodes)
+                 + size(self._thawed) + size(self._stored))
+        total += sum(size(frame) + size(frame[1]) for frame in self._frames)
+        total += sum(size(node) for node in self._nodes)
+        total += sum(size(frozen) for frozen in self._thawed.values())
+        return total
+
+
+class Profiler(object):
+    """Collects statistics about tokenizing, to find out what is slow.
+
+    Use the global profiler instance: call profiler.enable() to start
+    collecting, profiler.disable() to stop and profiler.result() to get the
+    statistics.
+
+    When enabled, the tokens() method of State and the token() method of
+    Parser are replaced with versions that count and time what they do. When
+    disabled, the original methods are put back, so there is no overhead at
+    all.
+
+    """
+    def __init__(self):
+        self._originals = None
+        self.clear()
+
+    def clear(self):
+        """Clear the collected statistics."""
+        # Parser class -> [searches, fallthroughs, time, tokens]
+        self._parsers = {}
+        # Token class -> number of rejected test_match() calls
+        self._rejected = {}
+
+    def enabled(self):
+        """Return True if the profiler is collecting statistics."""
+        return self._originals is not None
+
+    def enable(self):
+        """Start collecting statistics."""
+        if self._originals is None:
+            self._originals = State.tokens, Parser.token
+            State.tokens = _profiled_tokens
+            Parser.token = _profiled_token
+
+    def disable(self):
+        """Stop collecting statistics."""
+        if self._originals is not None:
+            State.tokens, Parser.token = self._originals
+            self._originals = None
+
+    def result(self):
+        """Return the statistics as a dictionary.
+
+        The 'parsers' key maps the name of every Parser class that was used to
+        a dictionary with the number of regular expression 'searches', the
+        number of 'fallthroughs', the 'time' spent in seconds and the number of
+        'tokens' generated. The 'rejected' key maps the name of every Token
+        class to the number of times its test_match() method returned False.
+
+        """
+        def name(cls):
+            return cls.__module__ + '.' + cls.__name__
+        return {
+            'parsers': dict((name(cls), {
+                'searches': searches,
+                'fallthroughs': fallthroughs,
+                'time': seconds,
+                'tokens': tokens,
+            }) for cls, (searches, fallthroughs, seconds, tokens)
+                in self._parsers.items()),
+            'rejected': dict((name(cls), count)
+                for cls, count in self._rejected.items()),
+        }
+
+    def report(self):
+        """Return the statistics as a human readable text table."""
+        result = self.result()
+        lines = ["{0:>10} {1:>10} {2:>10} {3:>10}  {4}".format(
+            "searches", "fallthr.", "tokens", "time (s)", "parser")]
+        for name, d in sorted(result['parsers'].items(),
+                              key=lambda i: i[1]['time'], reverse=True):
+            lines.append("{0:>10} {1:>10} {2:>10} {3:>10.4f}  {4}".format(
+                d['searches'], d['fallthroughs'], d['tokens'], d['time'], name))
+        lines.append("")
+        lines.append("{0:>10}  {1}".format("rejected", "token"))
+        for name, count in sorted(result['rejected'].items(),
+                                  key=lambda i: i[1], reverse=True):
+            lines.append("{0:>10}  {1}".format(count, name))
+        return '\n'.join(lines) + '\n'
+
+
+def _profiled_tokens(self, text, pos=0):
+    """State.tokens(), counting and timing what the parsers do."""
+    stats = profiler._parsers
+    timer = time.perf_counter
+    while True:
+        start = timer()
+        parser = self.parser()
+        try:
+            record = stats[type(parser)]
+        except KeyError:
+            record = stats[type(parser)] = [0, 0, 0.0, 0]
+        record[0] += 1
+        m = parser.parse(text, pos)
+        if m:
+            if parser.default and pos < m.start():
+                token =  parser.default(text[pos:m.start()], pos)
+                token.update_state(self)
+                record[2] += timer() - start
+                record[3] += 1
+                yield token
+                start = timer()
+            token = parser.token(m)
+            token.update_state(self)
+            record[2] += timer() - start
+            record[3] += 1
+            yield token
+            pos = m.end()
+        elif pos == len(text) or parser.fallthrough(self):
+            record[2] += timer() - start
+            break
+        else:
+            record[1] += 1
+            record[2] += timer() - start
+    if parser.default and pos < len(text):
+        token = parser.default(text[pos:], pos)
+        token.update_state(self)
+        record[3] += 1
+        yield token
+
+
+def _profiled_token(self, match):
+    """Parser.token(), counting the rejected test_match() calls."""
+    rejected = profiler._rejected
+    clss = self.index[match.lastindex]
+    for c in clss[:-1]:
+        if c.test_match(match):
+            return c(match.group(), match.start())
+        rejected[c] = rejected.get(c, 0) + 1
+    return clss[-1](match.group(), match.start())
+
+
+# the global profiler
+profiler = Profiler()
 
 
 def uniq(iterable):
@@ -23,7 +23,9 @@ Utility functions.
 
 from __future__ import unicode_literals
 
+import atexit
 import string
+import threading
 
 
 _nums = (
@@ -121,3 +123,40 @@ def mkid(*args):
     return "".join(result)
 
 
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def process_pool():
+    """Return the process pool shared by python-ly.
+
+    The concurrent.futures.ProcessPoolExecutor is created on the first call,
+    and is used by ly.lex.tokenize_lines() and ly.deps.Scanner when no other
+    executor is given. It is shut down when Python exits, or by
+    shutdown_process_pool().
+
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            import concurrent.futures
+            _pool = concurrent.futures.ProcessPoolExecutor()
+        return _pool
+
+
+@atexit.register
+def shutdown_process_pool():
+    """Shut down the shared process pool, if it was created.
+
+    This stops the worker processes, which is useful in long-running programs
+    that don't need the pool anymore. A following call to process_pool()
+    creates a new pool.
+
+    """
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown()
@@ -0,0 +1,164 @@
+"""Tests for ly.deps and the deps and fingerprint commands."""
+
+import concurrent.futures
+import json
+import os
+import sys
+
+import pytest
+
+import ly.cli.main
+import ly.deps
+import ly.docinfo
+import ly.document
+
+
+@pytest.fixture
+def project(tmp_path):
+    r"""A score including a file that includes files from lib.
+
+    In lib, common.ily and extra.ily include each other, and extra.ily
+    includes the part.ily in lib, not the one next to the score. The score
+    also includes a file that doesn't exist.
+
+    """
+    lib = tmp_path / 'lib'
+    lib.mkdir()
+    files = {
+        'score.ly': '\\include "part.ily"\n\\include "missing.ily"\n{ \\part }\n',
+        'part.ily': '\\include "common.ily"\npart = { c4 \\global }\n',
+        'lib/common.ily': '\\include "extra.ily"\nglobal = { s4 }\n',
+        'lib/extra.ily': '\\include "common.ily"\n\\include "part.ily"\n',
+        'lib/part.ily': '% no includes\n',
+    }
+    for name, text in files.items():
+        (tmp_path / name).write_text(text)
+    return tmp_path
+
+
+def run(capsys, monkeypatch, *args):
+    """Run the ly command with the arguments, return the standard output."""
+    monkeypatch.setattr(sys, 'argv', ['ly'] + list(args))
+    assert ly.cli.main.main() == 0
+    return capsys.readouterr().out
+
+
+def test_scanner(project):
+    score, part = str(project / 'score.ly'), str(project / 'part.ily')
+    common, extra, libpart = (str(project / 'lib' / name)
+                              for name in ('common.ily', 'extra.ily', 'part.ily'))
+    with concurrent.futures.ThreadPoolExecutor() as executor:
+        s = ly.deps.Scanner([str(project / 'lib')], executor=executor)
+        s.scan([score])
+    assert s.includes == {
+        score: [part],
+        part: [common],
+        common: [extra],
+        extra: [common, libpart],
+        libpart: [],
+    }
+    assert s.missing == {score: ['missing.ily']}
+    assert not s.unreadable
+    # the cycle is followed only once
+    assert s.dependencies(score) == [part, common, extra, libpart]
+    assert s.dependencies(extra) == [common, libpart]
+    assert s.dependents(common) == [extra, part, score]
+    assert s.dependents(score) == []
+    # without the include path, common.ily is not found
+    with concurrent.futures.ThreadPoolExecutor() as executor:
+        s = ly.deps.Scanner(executor=executor)
+        s.scan([score])
+    assert s.missing == {score: ['missing.ily'], part: ['common.ily']}
+    assert s.dependencies(score) == [part]
+
+
+def test_unreadable(tmp_path):
+    score = str(tmp_path / 'score.ly')
+    assert ly.deps.include_args(score) is None
+    (tmp_path / 'score.ly').write_text('\\include "/no/such/dir/x.ily"\n')
+    with concurrent.futures.ThreadPoolExecutor() as executor:
+        s = ly.deps.Scanner(executor=executor)
+        s.scan([score])
+    assert s.includes[score] == ['/no/such/dir/x.ily']
+    assert s.unreadable == set(['/no/such/dir/x.ily'])
+    assert not s.missing
+
+
+def test_relative_filenames(project, monkeypatch):
+    with concurrent.futures.ProcessPoolExecutor(1) as executor:
+        executor.submit(os.getcwd).result()     # start the worker here
+        monkeypatch.chdir(str(project))
+        s = ly.deps.Scanner(executor=executor)
+        s.scan(['score.ly'])
+    assert s.includes == {'score.ly': ['part.ily'], 'part.ily': []}
+    assert not s.unreadable
+
+
+def test_deps_command(project, capsys, monkeypatch):
+    monkeypatch.chdir(str(project))
+    lib = str(project / 'lib')
+    common, extra, libpart = (os.path.join(lib, name)
+                              for name in ('common.ily', 'extra.ily', 'part.ily'))
+    out = run(capsys, monkeypatch, '-I', lib, 'deps', 'score.ly', 'part.ily')
+    assert out == ('score.ly: part.ily {0} {1} {2}\n'
+                   'part.ily: {0} {1} {2}\n'.format(common, extra, libpart))
+    out = run(capsys, monkeypatch, '-I', lib, 'deps json', 'score.ly')
+    assert json.loads(out) == {
+        'roots': {'score.ly': ['part.ily', common, extra, libpart]},
+        'includes': {
+            'score.ly': ['part.ily'],
+            'part.ily': [common],
+            common: [extra],
+            extra: [common, libpart],
+            libpart: [],
+        },
+        'missing': {'score.ly': ['missing.ily']},
+        'unreadable': [],
+    }
+    # without -I
+    out = run(capsys, monkeypatch, 'deps', 'score.ly')
+    assert out == 'score.ly: part.ily\n'
+
+
+def test_makefile_escapes():
+    s = ly.deps.Scanner()
+    s.includes['my score.ly'] = ['a$b#c.ily']
+    assert s.makefile(['my score.ly']) == 'my\\ score.ly: a$$b\\#c.ily\n'
+
+
+SCORE = r"""\version "2.18.2"
+\include "part.ily"
+\score { \new Staff { \part } }
+"""
+
+PART = r"""part = \relative c' {
+  c4 d e f | g1
+}
+"""
+
+
+@pytest.mark.parametrize('score, part, same', [
+    (SCORE, PART, True),
+    (SCORE.replace('\\score', '% a comment\n\n\\score'), PART, True),
+    (SCORE, PART.replace('{\n  c4', '{ %{ block %} c4 '), True),
+    (SCORE.replace('  ', ' ').replace(' {', '\t{'), PART, True),
+    (SCORE, PART.replace('g1', 'g2 g'), False),
+    (SCORE.replace('2.18.2', '2.20.0'), PART, False),
+    (SCORE, PART.replace('c4', 'c4-.'), False),
+])
+def test_fingerprint_command(tmp_path, capsys, monkeypatch, score, part, same):
+    monkeypatch.chdir(str(tmp_path))
+    (tmp_path / 'score.ly').write_text(SCORE)
+    (tmp_path / 'part.ily').write_text(PART)
+    before = run(capsys, monkeypatch, 'fingerprint', 'score.ly')
+    assert len(before.strip()) == 40
+    (tmp_path / 'score.ly').write_text(score)
+    (tmp_path / 'part.ily').write_text(part)
+    after = run(capsys, monkeypatch, 'fingerprint', 'score.ly')
+    assert (after == before) == same
+    # the fingerprint of the file itself, the same in another process
+    info = ly.docinfo.DocInfo(ly.document.Document(part))
+    assert info.fingerprint() == ly.docinfo.fingerprint(info.tokens)
+    s = ly.deps.Scanner(fingerprints=True)
+    s.scan(['part.ily'])
+    assert s.fingerprints['part.ily'] == info.fingerprint()
@@ -0,0 +1,88 @@
+"""Tests for ly.docinfo."""
+
+import pytest
+
+import ly.docinfo
+import ly.document
+import ly.lex.lilypond
+
+
+TEXT = r"""\version "2.18.0"
+\include "english.ly"
+#(set-global-staff-size 18)
+#(load
+  "helpers.scm")
+
+#(define-markup-command (bold-title layout props text) (markup?)
+  (interpret-markup layout props (markup #:bold text)))
+
+melody = \relative c' { c4 d e f }
+words = \lyricmode { la la la }
+%{ global = { s1 } %}
+
+\paper { #(define output-suffix "part") }
+"""
+
+# every edit replaces the first occurrence of a text
+EDITS = [
+    ('2.18.0', '2.19.80'),
+    ('"english.ly"', '"deutsch.ly"'),
+    ('\\include "deutsch.ly"', '\\language "nederlands"'),
+    ('"nederlands"', '"espanol"'),
+    ('18)', '20)'),
+    ('"helpers.scm"', '"other.scm"'),
+    ('bold-title', 'title'),
+    ('melody =', 'tune ='),
+    ('%{', '%'),                    # uncomments global on the next line
+    ('%}', '\n\n%{ %}'),
+    ('words', '%words'),
+    ('"part"', '"score"'),
+    ('\\relative c\' { c4 d e f }', '{ }'),
+    ('\\version "2.19.80"\n', ''),
+    ('', '\\bookOutputName "x"\n'),
+]
+
+
+def summary(info):
+    """Return the results of the DocInfo methods."""
+    return {
+        'version': (info.version_string(), info.version()),
+        'include_args': info.include_args(),
+        'scheme_load_args': info.scheme_load_args(),
+        'output_args': info.output_args(),
+        'definitions': [(t, t.pos) for t in info.definitions()],
+        'markup_definitions': [(t, t.pos) for t in info.markup_definitions()],
+        'language': info.language(),
+        'global_staff_size': info.global_staff_size(),
+        'token_hash': info.token_hash(),
+        'fingerprint': info.fingerprint(),
+        'complete': info.complete(),
+        'has_output': info.has_output(),
+        'tokens': [(t, t.pos) for t in info.tokens],
+        'notes': list(info.indices(ly.lex.lilypond.Note)),
+        'names': info.count_tokens(ly.lex.lilypond.Name),
+    }
+
+
+def test_edits():
+    doc = ly.document.Document(TEXT)
+    info = ly.docinfo.IncrementalDocInfo(doc)
+    assert summary(info) == summary(ly.docinfo.DocInfo(doc))
+    for old, new in EDITS:
+        start = doc.plaintext().index(old)
+        with doc:
+            doc[start:start+len(old)] = new
+        assert summary(info) == summary(ly.docinfo.DocInfo(doc)), (old, new)
+
+
+@pytest.mark.parametrize('lookup', [False, True])
+def test_edits_at_once(lookup):
+    doc = ly.document.Document(TEXT)
+    info = ly.docinfo.IncrementalDocInfo(doc)
+    if lookup:
+        summary(info)   # fill the cache before the change
+    with doc:
+        for old, new in [e for e in EDITS if e[0] in TEXT][:8]:
+            start = TEXT.index(old)
+            doc[start:start+len(old)] = new
+    assert summary(info) == summary(ly.docinfo.DocInfo(doc))
@@ -0,0 +1,81 @@
+"""Tests for ly.docinfocache."""
+
+import os
+
+import pytest
+
+import ly.docinfocache
+import ly.pkginfo
+
+
+@pytest.fixture
+def summarized(monkeypatch):
+    """The list of the modes of the documents that were tokenized."""
+    calls = []
+    summarize = ly.docinfocache.summarize
+    def wrapper(info):
+        calls.append(info.mode())
+        return summarize(info)
+    monkeypatch.setattr(ly.docinfocache, 'summarize', wrapper)
+    return calls
+
+
+def write(path, text, mtime):
+    path.write_text(text)
+    os.utime(str(path), (mtime, mtime))
+    return str(path)
+
+
+def test_summary(tmp_path, summarized):
+    score = write(tmp_path / 'score.ly', '\\version "2.18.2"\n'
+        '\\include "common.ily"\n#(set-global-staff-size 18)\n'
+        'music = { c4 }\n', 1000000000)
+    with ly.docinfocache.DocInfoCache(str(tmp_path / 'cache.sqlite')) as cache:
+        s = cache.summary(score)
+        assert s.version == (2, 18, 2)
+        assert s.version_string == '2.18.2'
+        assert s.include_args == ['common.ily']
+        assert s.definitions == ['music']
+        assert s.global_staff_size == 18
+        assert cache.summary(score) == s
+    assert summarized == ['lilypond']
+    # the summaries are kept in the database
+    with ly.docinfocache.DocInfoCache(str(tmp_path / 'cache.sqlite')) as cache:
+        assert cache.summary(score) == s
+    assert summarized == ['lilypond']
+
+
+def test_invalidation(tmp_path, summarized):
+    a = write(tmp_path / 'a.ly', '\\version "2.18.2"\n', 1000000000)
+    b = write(tmp_path / 'b.ly', '\\version "2.20.0"\n', 1000000000)
+    cache = ly.docinfocache.DocInfoCache(':memory:')
+    cache.summaries([a, b])
+    assert len(summarized) == 2
+    # same size, other modification time, other contents
+    write(tmp_path / 'a.ly', '\\version "2.19.2"\n', 1000000010)
+    # other modification time, same contents: the hash is the same
+    write(tmp_path / 'b.ly', '\\version "2.20.0"\n', 1000000010)
+    result = cache.summaries([a, b])
+    assert result[a].version == (2, 19, 2)
+    assert result[b].version == (2, 20, 0)
+    assert len(summarized) == 3
+    assert cache.summaries([a, b]) == result
+    assert len(summarized) == 3
+    os.remove(a)
+    assert cache.summaries([a, b]) == {a: None, b: result[b]}
+    cache.clear()
+    cache.summary(b)
+    assert len(summarized) == 4
+    cache.close()
+
+
+def test_other_version(tmp_path, summarized, monkeypatch):
+    a = write(tmp_path / 'a.ly', '{ c }', 1000000000)
+    filename = str(tmp_path / 'cache.sqlite')
+    with ly.docinfocache.DocInfoCache(filename) as cache:
+        cache.summary(a)
+    # the cache is emptied when written by another version
+    monkeypatch.setattr(ly.pkginfo, 'version', ly.pkginfo.version + '.1')
+    with ly.docinfocache.DocInfoCache(filename) as cache:
+        cache.summary(a)
+    assert len(summarized) == 2
@@ -0,0 +1,250 @@
+"""Tests for ly.document."""
+
+import itertools
+import random
+import re
+
+import pytest
+
+import ly.document
+
+
+TEXT = ''.join('line{0} = {{ c4 d e f }}\n'.format(i) for i in range(3000))
+
+
+def test_copy_keeps_blocks_of_original():
+    d = ly.document.Document(TEXT)
+    blocks = list(d)
+    c = d.copy()
+    with d:
+        d[0:0] = 'x\n'
+    assert c.plaintext() == TEXT
+    assert d.index(blocks[100]) == 101
+    assert d[101] is blocks[100]
+    with d:
+        d[d.position(blocks[2000]):d.position(blocks[2001])] = ''
+    assert d.index(blocks[2500]) == 2500
+    assert c.index(c[2500]) == 2500
+
+
+def test_copy_changes_do_not_affect_original():
+    d = ly.document.Document(TEXT)
+    blocks = list(d)
+    c = d.copy()
+    c2 = c.copy()
+    with c:
+        c[0:len(TEXT) // 2] = 'y'
+    with c2:
+        c2[len(TEXT) - 10:] = '\n'.join(['{ e4 }'] * 1000)
+    assert d.plaintext() == TEXT
+    assert [d.index(b) for b in blocks] == list(range(len(blocks)))
+    assert c.plaintext() == 'y' + TEXT[len(TEXT) // 2:]
+    assert c2.plaintext() == TEXT[:-10] + '\n'.join(['{ e4 }'] * 1000)
+    for doc in d, c, c2:
+        tokens = [t for b in doc for t in doc.tokens(b)]
+        fresh = ly.document.Document(doc.plaintext())
+        assert tokens == [t for b in fresh for t in fresh.tokens(b)]
+
+
+def check_blocks(doc, text):
+    """Check the blocks of doc against the lines of text."""
+    lines = text.split('\n')
+    assert doc.plaintext() == text
+    assert len(doc) == len(lines)
+    pos = 0
+    for i, line in enumerate(lines):
+        block = doc[i]
+        assert doc.text(block) == line
+        assert doc.index(block) == i
+        assert doc.position(block) == pos
+        assert doc.block(pos) is block
+        assert doc.block(pos + len(line)) is block
+        pos += len(line) + 1
+
+
+def test_block_positions(monkeypatch):
+    # small chunks, so that the edits split, merge and remove many of them
+    monkeypatch.setattr(ly.document._BlockList, 'chunksize', 4)
+    rnd = random.Random(5)
+    text = TEXT[:2000]
+    d = ly.document.Document(text)
+    check_blocks(d, text)
+    for n in range(300):
+        start = rnd.randrange(len(text) + 1)
+        end = min(len(text), start + rnd.choice((0, 1, 5, 30, 200)))
+        new = rnd.choice(('', 'x', '\n', 'a\nb', '{ c4 }\n' * rnd.randrange(12)))
+        with d:
+            d[start:end] = new
+        text = text[:start] + new + text[end:]
+        check_blocks(d, text)
+
+
+def lexed(doc):
+    """Return the tokens and the frozen state at the end of every block."""
+    return [([(type(t), t.pos, t) for t in doc.tokens(b)], doc.state_end(b).freeze())
+            for b in doc]
+
+
+def _transpose(text):
+    return [(m.start(), m.end(), 'cis') for m in re.finditer(r'\bc(?=4)', text)]
+
+def _same_line(text):
+    return [(5, 6, 'X'), (8, 9, ''), (10, 10, 'YY'), (12, 15, '\n')]
+
+def _join_lines(text):
+    return [(m.start(), m.end(), ' ') for m in re.finditer('\n', text)][::7]
+
+def _split_lines(text):
+    return [(m.start(), m.start(), '\n') for m in re.finditer('=', text)]
+
+def _comment(text):
+    return [(100, 100, '%{'), (2500, 2505, ''), (4000, 4000, '%}'), (len(text) - 5, None, '\n')]
+
+
+@pytest.mark.parametrize('edits', [_transpose, _same_line, _join_lines, _split_lines, _comment])
+def test_many_changes(edits):
+    text = TEXT[:30000]
+    d = ly.document.Document(text)
+    blocks = list(d)
+    changes = []
+    d.add_listener(changes.append)
+    edits = edits(text)
+    with d:
+        for start, end, new in edits:
+            d[start:end] = new
+    touched = set()
+    for start, end, new in sorted(edits, key=lambda e: e[0], reverse=True):
+        end = len(text) if end is None else end
+        touched.update(range(text.count('\n', 0, start), text.count('\n', 0, end) + 1))
+        text = text[:start] + new + text[end:]
+    assert len(changes) == 1
+    check_blocks(d, text)
+    # blocks without changes are kept
+    kept = [b for i, b in enumerate(blocks) if i not in touched]
+    assert set(map(id, kept)) <= set(map(id, d))
+    assert lexed(d) == lexed(ly.document.Document(text))
+
+
+def test_overlapping_changes():
+    d = ly.document.Document(TEXT[:30000])
+    p = [d.position(d[i]) for i in (5, 10, 20, 25)]
+    with d:
+        d[p[1]:p[1] + 4] = 'A'
+        d[p[2]:p[2] + 4] = 'B'
+        d[p[0]:p[3]] = 'C\n'
+    # the change that starts first wins
+    text = TEXT[:p[0]] + 'C\n' + TEXT[p[3]:30000]
+    check_blocks(d, text)
+    assert lexed(d) == lexed(ly.document.Document(text))
+
+
+def test_tokens_with_position_cache():
+    d = ly.document.Document(TEXT[:1000])
+    tokens = d.tokens_with_position(d[1])
+    assert d.tokens_with_position(d[1]) is tokens
+    assert tokens[0].pos == d.position(d[1])
+    with d:
+        # not cached while changing, most of these blocks are changed
+        t = d.tokens_with_position(d[2])
+        assert d.tokens_with_position(d[2]) is not t
+        assert d.tokens_with_position(d[1]) is tokens
+        d[0:0] = 'x'
+    assert d.tokens_with_position(d[1]) is not tokens
+    assert d.tokens_with_position(d[1])[0].pos == tokens[0].pos + 1
+
+
+def test_copies_edited_in_turn(monkeypatch):
+    monkeypatch.setattr(ly.document._BlockList, 'chunksize', 8)
+    rnd = random.Random(13)
+    family = [(ly.document.Document(TEXT[:5000]), TEXT[:5000])]
+    original = family[0][0]
+    blocks = list(original)
+    for n in range(200):
+        i = rnd.randrange(len(family))
+        doc, text = family[i]
+        if rnd.random() < .2:
+            family.append((doc.copy(), text))
+            continue
+        start = rnd.randrange(len(text) + 1)
+        end = min(len(text), start + rnd.randrange(100))
+        new = rnd.choice(('', 'x\n', '%{', '{ c4 }\n' * 3))
+        with doc:
+            doc[start:end] = new
+        family[i] = doc, text[:start] + new + text[end:]
+        if doc is original:
+            # the blocks before and after the change are still valid
+            first, last = text.count('\n', 0, start), text.count('\n', 0, end)
+            added = new.count('\n') - (last - first)
+            assert [original.index(b) for b in blocks[:first]] == list(range(first))
+            assert ([original.index(b) for b in blocks[last+1:]] ==
+                    list(range(last + 1 + added, len(blocks) + added)))
+            blocks = list(original)
+        else:
+            assert [original.index(b) for b in blocks] == list(range(len(blocks)))
+    for doc, text in family:
+        check_blocks(doc, text)
+        assert lexed(doc) == lexed(ly.document.Document(text))
+
+
+LINES = ['\\version "2.18.2"', '', 'music = {', '  c4 d e f', '  %{ comment', '  %} g1', '}']
+
+
+@pytest.mark.parametrize('old, new', [
+    (LINES, LINES[:]),                                  # identical
+    ([''], LINES),                                      # empty document
+    (LINES, ['']),                                      # empty new text
+    (LINES, LINES + ['{ a }', '']),                     # append only
+    (LINES[:3], LINES),                                 # append lines after the last
+    (LINES, LINES[:2] + LINES[4:]),                     # delete only
+    (LINES, LINES[:5]),                                 # delete at the end
+    (LINES, LINES[2:]),                                 # delete at the start
+    (LINES, LINES[:3] + ['  cis4 %{', 'x'] + LINES[5:]),  # change in the middle
+])
+def test_update_text(old, new):
+    d = ly.document.Document('\n'.join(old))
+    blocks = list(d)
+    changes = []
+    d.add_listener(changes.append)
+    d.update_text('\r\n'.join(new))
+    text = '\n'.join(new)
+    check_blocks(d, text)
+    assert lexed(d) == lexed(ly.document.Document(text))
+    if old == new:
+        assert not changes
+        assert list(d) == blocks
+        return
+    assert len(changes) == 1
+    # the blocks of the lines the texts have in common at the start are kept
+    prefix = len(list(itertools.takewhile(lambda p: p[0] == p[1], zip(old, new))))
+    assert list(d)[:prefix] == blocks[:prefix]
+    change = changes[0]
+    assert text[:change.position] == '\n'.join(old)[:change.position]
+    assert (text[change.position + change.added:] ==
+            '\n'.join(old)[change.position + change.removed:])
+
+
+@pytest.mark.parametrize('compact, lazy', [(True, False), (False, True), (True, True)])
+def test_compact_and_lazy(compact, lazy):
+    rnd = random.Random(int(compact) * 2 + int(lazy))
+    text = TEXT[:20000]
+    d = ly.document.Document(text, compact=compact, lazy=lazy)
+    partial = 0
+    for n in range(100):
+        start = rnd.randrange(len(text) + 1)
+        end = min(len(text), start + rnd.randrange(300))
+        new = rnd.choice(('', 'x\n', '%{', '%}', '#(a\n', ')', '{ c4 }\n' * 3))
+        with d:
+            d[start:end] = new
+        text = text[:start] + new + text[end:]
+        if n % 10 == 0:
+            # look at some blocks, so only a part of a lazy document is tokenized
+            eager = ly.document.Document(text)
+            for i in sorted(rnd.sample(range(len(d)), 3), reverse=lazy):
+                b, e = d[i], eager[i]
+                assert ([(type(t), t.pos, t) for t in d.tokens_with_position(b)] ==
+                        [(type(t), t.pos, t) for t in eager.tokens_with_position(e)])
+                assert d.state_end(b).freeze() == eager.state_end(e).freeze()
+            partial += d._lexed < len(d)
+    assert bool(partial) == lazy
+    check_blocks(d, text)
+    assert lexed(d) == lexed(ly.document.Document(text))
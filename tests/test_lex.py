@@ -0,0 +1,183 @@
+"""Tests for ly.lex."""
+
+import io
+import mmap
+import sys
+import threading
+
+import pytest
+
+import ly.document
+import ly.lex
+import ly.slexer
+import ly.util
+
+
+def test_line_cache_threads():
+    cache = ly.lex.LineCache(maxsize=5)
+    lines = ['{{ c{0} d e }}'.format(i % 10) for i in range(2000)]
+    errors = []
+
+    def tokenize():
+        try:
+            state = ly.lex.state('lilypond')
+            for line in lines:
+                tokens, frozen = cache.tokens(state, line)
+                assert ''.join(tokens) == line
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=tokenize) for i in range(8)]
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    finally:
+        sys.setswitchinterval(interval)
+    assert not errors
+    info = cache.info()
+    assert info['hits'] + info['misses'] == 8 * len(lines)
+    assert info['size'] <= 5
+
+
+def tokens(mode, text):
+    state = ly.lex.state(mode)
+    return list(state.tokens(text))
+
+
+def test_scheme_words():
+    from ly import data
+    from ly.lex import scheme
+    lists = [
+        (scheme.Constant, data.scheme_constants()),
+        (scheme.Keyword, data.scheme_keywords()),
+        (scheme.Function, data.scheme_functions()),
+        (scheme.Variable, data.scheme_variables()),
+    ]
+    words = [w for cls, l in lists for w in l] + ['foo', 'bar-baz']
+    classes = (scheme.Word,) + tuple(cls for cls, l in lists)
+    for t in tokens('scheme', '(' + ' '.join(words) + ')'):
+        if type(t) in classes:
+            expected = next((cls for cls, l in lists if t in l), scheme.Word)
+            assert type(t) is expected, t
+
+
+def test_lilypond_commands():
+    from ly import words
+    from ly.lex import lilypond
+    scripts = (words.articulations + words.ornaments + words.fermatas
+               + words.instrument_scripts + words.repeat_scripts
+               + words.ancient_scripts)
+    lists = [
+        (lilypond.Keyword, words.lilypond_keywords),
+        (lilypond.Command, words.lilypond_music_commands),
+        (lilypond.ArticulationCommand, scripts),
+    ]
+    commands = [w for cls, l in lists for w in l] + ['foo', 'bar-baz']
+    found = set()
+    for command in commands:
+        t = tokens('lilypond', '{ \\' + command + ' }')[2]
+        found.add(type(t))
+        for cls, l in lists:
+            if type(t) is cls:
+                assert command in l and '-' not in command
+        if type(t) is lilypond.UserCommand:
+            assert '-' in command or not any(command in l for cls, l in lists)
+    assert found.issuperset(cls for cls, l in lists)
+    for command in words.markupcommands + ('foo',):
+        t = tokens('lilypond', '\\markup { \\' + command + ' }')[4]
+        if type(t) is lilypond.MarkupCommand:
+            assert command in words.markupcommands
+        elif type(t) is lilypond.MarkupUserCommand:
+            assert command not in words.markupcommands
+
+
+def test_tokenize_lines_shared_pool():
+    lines = ['music{0} = {{'.format(i) if i % 7 == 0 else
+             '  c{0} %{{ x'.format(i) if i % 11 == 0 else
+             '  %}} d e }}' if i % 13 == 0 else
+             '  f g' for i in range(500)]
+    state = ly.lex.state('lilypond')
+    expected = []
+    for line in lines:
+        tokens = [(type(t), t, t.pos) for t in state.tokens(line)]
+        expected.append((tokens, state.freeze()))
+
+    def tokenize():
+        result = ly.lex.tokenize_lines(lines, 'lilypond', chunksize=60)
+        return [([(type(t), t, t.pos) for t in tokens], frozen)
+                for tokens, frozen in result]
+
+    try:
+        pool = ly.util.process_pool()
+        assert ly.util.process_pool() is pool
+        assert tokenize() == expected
+        ly.util.shutdown_process_pool()
+        assert ly.util.process_pool() is not pool
+        assert tokenize() == expected
+    finally:
+        ly.util.shutdown_process_pool()
+
+
+def test_fridge_count():
+    fridge = ly.slexer.Fridge()
+    state = ly.lex.state('lilypond')
+    numbers = set()
+    for line in (r'\score {', r'  \new Staff << { c4 }', r'  #(define x', r'  2) >>', '}'):
+        for t in state.tokens(line):
+            numbers.add(fridge.freeze(state))
+            assert fridge.freeze(state) in numbers
+    assert fridge.count() == len(numbers)
+    assert fridge.count_nodes() >= len(numbers)
+    assert all(fridge.thaw(n).freeze() == fridge.frozen(n) for n in numbers)
+    # store a single nested state; its outer parsers are nodes, not states
+    fridge = ly.slexer.Fridge()
+    state = ly.lex.state('lilypond')
+    list(state.tokens(r'\score { \new Staff << { \relative c\' { c4 #(list (list'))
+    num = fridge.freeze(state)
+    assert fridge.freeze(state) == num
+    assert fridge.count() == 1
+    assert fridge.count_nodes() == len(state.freeze()) > 1
+
+
+STREAM_TEXT = '\\version "2.18.2"\r\n{ c4 d\re f }\r\n%{ comment\n é %}\n\n  \\markup { x }'
+
+
+def streamed(text):
+    """Return the tokens ly.lex.state().tokens() gives for the lines of text."""
+    lines = text.replace('\r', '').split('\n')
+    state = ly.lex.state('lilypond')
+    result = []
+    pos = 0
+    for i, line in enumerate(lines):
+        if i:
+            result.append((ly.lex.Newline, '\n', pos - 1))
+        result.extend((type(t), t, pos + t.pos) for t in state.tokens(line))
+        pos += len(line) + 1
+    return result
+
+
+@pytest.mark.parametrize('kind', ['str', 'bytes', 'text file', 'binary file', 'mmap'])
+def test_stream_tokens(tmp_path, kind):
+    path = tmp_path / 'stream.ly'
+    path.write_bytes(STREAM_TEXT.encode('utf-8'))
+    with open(str(path), 'rb') as f:
+        if kind == 'str':
+            source = str(path)
+        elif kind == 'bytes':
+            source = str(path).encode()
+        elif kind == 'text file':
+            source = io.open(str(path), encoding='utf-8', newline='')
+        elif kind == 'binary file':
+            source = f
+        else:
+            source = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        tokens = [(type(t), t, t.pos) for t in ly.lex.stream_tokens(source, 'lilypond')]
+        if kind == 'text file':
+            source.close()
+    assert tokens == streamed(STREAM_TEXT)
+    text = STREAM_TEXT.replace('\r', '')
+    assert all(text[pos:pos+len(t)] == t for cls, t, pos in tokens)
@@ -0,0 +1,101 @@
+"""Tests for ly.music."""
+
+import os
+
+import pytest
+
+import ly.bench.corpus
+import ly.document
+import ly.music
+import ly.music.items
+
+
+def music(text, lazy=False):
+    return ly.music.document(ly.document.Document(text), lazy)
+
+
+def test_copy_attributes():
+    m = music(r'''\new Staff = "one" {
+        \clef "treble_8" \time #'(2 2) 3/8
+        \repeat volta #2 { c4 } \new Voice = v { d } \lyricsto "v" { la } }''')
+    c = m.copy()
+    for item, copy in zip(m.iter_depth(), c.iter_depth()):
+        assert type(item) is type(copy)
+        for name in ('_specifier', '_repeat_count', '_context_id', '_beatstructure'):
+            value = getattr(copy, name, None)
+            if isinstance(value, ly.node.Node):
+                assert value is not getattr(item, name)
+                assert value.dump() == getattr(item, name).dump()
+        for method in ('specifier', 'repeat_count', 'context_id', 'measure_length'):
+            if hasattr(item, method):
+                assert getattr(item, method)() == getattr(copy, method)()
+
+
+def outline(node):
+    """Return a list describing every node in the tree, depth first."""
+    result = []
+    for depth, n in enumerate_depth(node):
+        length = n.length() if isinstance(n, ly.music.items.Music) else None
+        result.append((depth, type(n).__name__, n.token, n.position,
+                       n.end_position(), getattr(n, 'duration', None), length))
+    return result
+
+
+def enumerate_depth(node, depth=0):
+    yield depth, node
+    for n in node:
+        for item in enumerate_depth(n, depth + 1):
+            yield item
+
+
+def sources():
+    folder = os.path.join(os.path.dirname(__file__), 'test_xml_files')
+    for name in sorted(os.listdir(folder)):
+        if name.endswith('.ly'):
+            yield ly.document.Document.load(os.path.join(folder, name))
+    for seed in range(3):
+        yield ly.document.Document(ly.bench.corpus.lilypond(200, seed))
+
+
+def unread(node):
+    """Yield the Lazy items that are not read, without reading them."""
+    for n in node:
+        if isinstance(n, ly.music.items.Lazy) and not n.is_read():
+            yield n
+        else:
+            for item in unread(n):
+                yield item
+
+
+def read_backwards(node):
+    """Read the children of every node, the last ones first."""
+    for n in reversed(list(node)):
+        read_backwards(n)
+
+
+@pytest.mark.parametrize('doc', list(sources()))
+def test_lazy(doc):
+    eager = outline(ly.music.document(doc))
+    lazy = ly.music.document(doc, True)
+    lazies = list(unread(lazy))
+    assert lazies
+    read_backwards(lazy)
+    assert all(n.is_read() for n in lazies)
+    assert not list(unread(lazy))
+    assert outline(lazy) == eager
+
+
+@pytest.mark.parametrize('compact, lazy', [(False, False), (True, True)])
+def test_lazy_edit_after_build(compact, lazy):
+    text = 'a = { c4 d e }\nb = { f g }\n'
+    eager = outline(music(text))
+    doc = ly.document.Document(text, compact=compact, lazy=lazy)
+    tree = ly.music.document(doc, True)
+    assert list(unread(tree))
+    with doc:
+        doc[0:0] = 'x = 1\n'
+    with doc:
+        doc[10:20] = '}'
+    # the lazy items are read from the text the tree was built from
+    assert outline(tree) == eager
+    assert tree.document is doc
@@ -0,0 +1,129 @@
+"""Tests for ly.music.cache."""
+
+import os
+import threading
+from fractions import Fraction
+
+import ly.document
+import ly.music
+import ly.music.cache
+import ly.music.items
+
+
+def write(path, text, mtime=None):
+    path.write_text(text)
+    if mtime is not None:
+        os.utime(str(path), (mtime, mtime))
+    return str(path)
+
+
+def test_lru(tmp_path):
+    cache = ly.music.cache.IncludeCache(maxsize=2)
+    a, b, c = (write(tmp_path / name, '{ c4 }') for name in ('a.ly', 'b.ly', 'c.ly'))
+    doc = cache.document(a)
+    cache.document(b)
+    assert cache.document(a) is doc
+    cache.document(c)           # removes b, which was used least recently
+    assert cache.info() == {'hits': 1, 'misses': 3, 'size': 2, 'maxsize': 2}
+    assert cache.document(a) is doc
+    cache.document(b)
+    assert cache.info()['misses'] == 4
+    cache.resize(1)
+    assert cache.info()['size'] == 1
+    cache.clear()
+    assert cache.info() == {'hits': 0, 'misses': 0, 'size': 0, 'maxsize': 1}
+
+
+def test_invalidation(tmp_path):
+    cache = ly.music.cache.IncludeCache()
+    filename = write(tmp_path / 'a.ly', '{ c4 }', 1000000000)
+    doc = cache.document(filename)
+    assert cache.document(filename) is doc
+    # same size, other modification time
+    write(tmp_path / 'a.ly', '{ d4 }', 1000000010)
+    assert cache.document(filename).plaintext() == '{ d4 }'
+    # other size, same modification time
+    write(tmp_path / 'a.ly', '{ e4 f }', 1000000010)
+    assert cache.document(filename).plaintext() == '{ e4 f }'
+    assert cache.info()['misses'] == 3
+
+
+def test_music_copies(tmp_path):
+    cache = ly.music.cache.IncludeCache()
+    filename = write(tmp_path / 'a.ly', r"music = \repeat volta 2 { c4 d }")
+    m1 = cache.music(filename)
+    m2 = cache.music(filename)
+    assert m1 is not m2
+    assert m1.dump() == m2.dump()
+    assert m1.include_cache is cache
+    assert m1.document is m2.document
+    nodes = set(map(id, m1.iter_depth()))
+    assert not nodes & set(map(id, m2.iter_depth()))
+    repeat = m1[0].value()
+    assert repeat.specifier() == 'volta'
+    repeat[0].append(ly.music.items.Note())
+    assert len(m2[0].value()[0]) == 2
+
+
+def test_include(tmp_path):
+    write(tmp_path / 'common.ily', r"mel = { c4 \global }")
+    for i in 1, 2:
+        write(tmp_path / 'score{0}.ly'.format(i),
+              'global = {{ s{0} }}\n\\include "common.ily"\n'.format(i))
+    cache = ly.music.cache.IncludeCache()
+    for i in 1, 2:
+        doc = ly.document.Document.load(str(tmp_path / 'score{0}.ly'.format(i)))
+        m = ly.music.document(doc, include_cache=cache)
+        included = m.get_included_document_node(m[1])
+        assert included.include_node is m[1]
+        assert included.include_cache is cache
+        # \global is looked up in the document including the file
+        glob = included[0].value()[1]
+        assert glob.value().length() == Fraction(1, i)
+    assert cache.info()['misses'] == 1
+
+
+def test_threads(tmp_path):
+    cache = ly.music.cache.IncludeCache(maxsize=3)
+    filenames = [write(tmp_path / '{0}.ly'.format(i), '{{ c{0} d e }}'.format(i))
+                 for i in range(1, 6)]
+    expected = [ly.music.document(ly.document.Document.load(f)).dump()
+                for f in filenames]
+    errors = []
+
+    def work():
+        try:
+            for n in range(20):
+                for f, dump in zip(filenames, expected):
+                    assert cache.music(f).dump() == dump
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=work) for i in range(6)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert not errors
+
+
+class MyDocument(ly.music.items.Document):
+    """A Document subclass with the constructor of older versions."""
+    def __init__(self, doc):
+        super(MyDocument, self).__init__(doc)
+
+
+def test_document_subclass(tmp_path):
+    write(tmp_path / 'common.ily', r"mel = { c4 d }")
+    filename = write(tmp_path / 'score.ly', '\\include "common.ily"\n{ \\mel }\n')
+    cache = ly.music.cache.IncludeCache()
+    for include_cache in None, cache:
+        m = MyDocument(ly.document.Document.load(filename))
+        m.include_cache = include_cache
+        m.lazy = True
+        included = m.get_included_document_node(m[0])
+        assert type(included) is MyDocument
+        assert included.include_cache is include_cache
+        assert included.lazy
+        assert m[1][0].value().length() == Fraction(1, 2)
+    assert cache.info()['misses'] == 1
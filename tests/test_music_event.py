@@ -0,0 +1,88 @@
+"""Tests for ly.music.event."""
+
+from fractions import Fraction
+
+import pytest
+
+import ly.document
+import ly.music
+import ly.music.event
+import ly.music.items
+
+
+def events(text):
+    """Return the (time, token text) of the notes and rests in the text."""
+    music = ly.music.document(ly.document.Document(text))[0]
+    return [(time, node.token)
+            for time, node, scaling in ly.music.event.iter_events(music)
+            if isinstance(node, ly.music.items.Durable)]
+
+
+def test_simultaneous_order():
+    assert events('<< { c4 d4 } { e4 f4 } >>') == [
+        (0, 'c'), (0, 'e'), (Fraction(1, 4), 'd'),
+        (Fraction(1, 4), 'f')]
+
+
+def test_nested_simultaneous_order():
+    result = events(r'''
+        \new StaffGroup <<
+          \new Staff << { c2 d } \\ { e4 f g a } >>
+          \new Staff { r4 b2 c4 }
+        >>''')
+    assert result == sorted(result, key=lambda e: e[0])
+    assert [token for time, token in result] == [
+        'c', 'e', 'r', 'f', 'b', 'd', 'g', 'a', 'c']
+
+
+class Traversal(ly.music.event.Events):
+    """Records every traversed item, in the order Events traverses them."""
+    def __init__(self, unfold_repeats):
+        self.unfold_repeats = unfold_repeats
+        self.items = []
+
+    def traverse(self, node, time, scaling):
+        self.items.append((time, node, scaling))
+        return node.events(self, time, scaling)
+
+
+TEXTS = [
+    r"{ c4 << { d8 e } \\ { f4. } >> \tuplet 3/2 { g8 a b } <c e>2 }",
+    r"""\new PianoStaff <<
+          \new Staff \relative c'' { \repeat volta 2 { c4 d } \alternative { { e2 } { f2 } } }
+          \new Staff { \grace { g16 } \partial 4 a4 | s2*3 r2 }
+          \new Lyrics \lyricmode { la4 la la2 }
+        >>""",
+    r"{ \repeat unfold 3 { c8 d } \repeat percent 2 { e4 } \scaleDurations 2/3 { f4 g a } }",
+]
+
+
+@pytest.mark.parametrize('unfold', [False, True])
+@pytest.mark.parametrize('text', TEXTS)
+def test_against_traversal(text, unfold):
+    document = ly.music.document(ly.document.Document(text))
+    music = document[0]
+    t = Traversal(unfold)
+    t.traverse(music, 0, 1)
+    expected = sorted(t.items, key=lambda item: (item[0], item[1].position))
+    result = list(ly.music.event.iter_events(music, unfold_repeats=unfold))
+    assert result == expected
+
+
+def test_variables():
+    doc = ly.document.Document(r"""
+        mel = { c4 d }
+        { \mel << \mel { e2 } >> f4 }""")
+    document = ly.music.document(doc)
+    music = document[1]
+    t = Traversal(False)
+    t.traverse(music, 0, 1)
+    result = list(ly.music.event.iter_events(music))
+    key = lambda item: (item[0], id(item[1]), item[2])
+    assert sorted(result, key=key) == sorted(t.items, key=key)
+    times = [time for time, node, scaling in result]
+    assert times == sorted(times)
+    # the music of a variable comes right after the variable
+    for i, (time, node, scaling) in enumerate(result):
+        if isinstance(node, ly.music.items.UserCommand):
+            assert result[i+1][1] is node.value()
@@ -0,0 +1,72 @@
+"""Tests for the time index of ly.music (Music.time_index())."""
+
+from fractions import Fraction
+
+import pytest
+
+import ly.document
+import ly.music
+import ly.music.event
+import ly.music.items
+
+
+TEXTS = [
+    r"{ c4 d8 e16 f g2 a b1 }",
+    r"\relative c' { c4 \tuplet 3/2 { d8 e f } g2 \times 2/3 { a4 b c } d1 }",
+    r"{ c4 << { d4 e } \\ { f2 } >> g4 <a c e>2 s1*3/4 r4 }",
+    r"{ \repeat volta 2 { c4 d } \alternative { { e2 } { f2 } } \grace { g16 } a4 }",
+    r"""mel = { c4 d e f }
+        { \mel \mel g1 }
+        \score { \new Staff { \partial 4 c4 | d2 e | \mel } }""",
+    r"{ \scaleDurations 2/3 { c4 d e } \new Voice { \voiceOne f4 \oneVoice g } }",
+]
+
+
+def baseline(music, position):
+    """Return the time at the position, traversing all preceding events."""
+    events = music.music_events_til_position(position)
+    if events:
+        e = ly.music.event.Events()
+        time = 0
+        scaling = 1
+        for parent, nodes, s in events:
+            scaling *= s
+            for n in nodes:
+                time = e.traverse(n, time, scaling)
+        return time
+
+
+def check(text, music):
+    times = [baseline(music, pos) for pos in range(len(text) + 1)]
+    assert [music.time_position(pos) for pos in range(len(text) + 1)] == times
+    for start in range(0, len(text) + 1, 3):
+        for end in range(start, len(text) + 1, 5):
+            length = music.time_length(start, end)
+            if length is not None:
+                assert length == times[end] - times[start]
+
+
+@pytest.mark.parametrize('text', TEXTS)
+def test_time_position(text):
+    music = ly.music.document(ly.document.Document(text))
+    check(text, music)
+    # asking again uses the stored index
+    check(text, music)
+
+
+@pytest.mark.parametrize('text', TEXTS)
+def test_changed_music(text):
+    music = ly.music.document(ly.document.Document(text))
+    check(text, music)
+    for n, note in enumerate(music.find(ly.music.items.Durable)):
+        if n % 2:
+            note.duration = Fraction(1, 2), note.duration[1]
+            note.forget_time_index()
+    check(text, music)
+    for seq in list(music.find(ly.music.items.MusicList)):
+        if len(seq) > 1:
+            del seq[len(seq) // 2]
+        skip = ly.music.items.Skip()
+        skip.duration = Fraction(1), 1
+        seq.append(skip)
+    check(text, music)